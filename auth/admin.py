@@ -0,0 +1,19 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from config import ADMIN_TOKEN
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    校验管理接口令牌（FastAPI依赖）
+
+    未配置ADMIN_TOKEN时管理接口整体禁用。
+
+    Args:
+        x_admin_token: 请求头中的管理令牌
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="管理接口未启用")
+
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="管理令牌无效")
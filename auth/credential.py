@@ -1,6 +1,12 @@
 import httpx
-from config import API_URL, API_KEY_PREFIX
+from config import API_URL, API_KEY_PREFIX, VERIFY_FAILURE_THRESHOLD, VERIFY_RESET_TIMEOUT
 from urllib.parse import urljoin
+from utils import CircuitBreaker
+
+# 上游验证服务的熔断器，就绪检查通过它判断上游状态而无需真正发起请求
+verifier_circuit = CircuitBreaker(
+    failure_threshold=VERIFY_FAILURE_THRESHOLD, reset_timeout=VERIFY_RESET_TIMEOUT
+)
 
 async def verify_api_key(api_key: str) -> bool:
     """
@@ -16,6 +22,11 @@ async def verify_api_key(api_key: str) -> bool:
     if not api_key.startswith(API_KEY_PREFIX):
         print(f"API密钥前缀无效: {api_key}")
         return False
+
+    # 熔断器打开时直接拒绝，避免请求堆积在不可用的上游
+    if not verifier_circuit.allow_request():
+        print("API密钥验证服务熔断中，拒绝验证")
+        return False
         
     try:
         # 使用urljoin构建URL，自动处理尾部斜杠问题
@@ -24,6 +35,13 @@ async def verify_api_key(api_key: str) -> bool:
         async with httpx.AsyncClient() as client:
             headers = {"x-api-key": api_key}
             response = await client.get(verify_url, headers=headers)
+
+            # 只有上游自身故障才计入熔断，密钥无效不算
+            if response.status_code >= 500:
+                verifier_circuit.record_failure()
+                return False
+            verifier_circuit.record_success()
+
             data = response.json()
             
             if response.status_code == 200 and data.get("data", {}).get("valid", False):
@@ -31,4 +49,5 @@ async def verify_api_key(api_key: str) -> bool:
             return False
     except Exception as e:
         print(f"API密钥验证失败: {e}")
+        verifier_circuit.record_failure()
         return False
@@ -0,0 +1,2 @@
+# 基准测试模块初始化文件
+# 在项目根目录下通过 python -m benchmarks.<name> 运行
@@ -0,0 +1,111 @@
+"""
+空闲SSE连接内存/CPU基准
+
+在进程内通过routes.mcp.handle_sse建立N个从不发送消息的SSE会话，
+报告每个连接的常驻内存增量和建立连接及空闲期间消耗的CPU时间。
+上游API密钥验证被替换为本地直接通过，会话存储使用内存后端。
+
+用法:
+    python -m benchmarks.idle_connections [--connections 10000] [--idle 5]
+"""
+import argparse
+import gc
+import logging
+import os
+import resource
+import time
+
+import anyio
+from starlette.requests import Request
+
+os.environ.setdefault("SESSION_BACKEND", "memory")
+
+from database.db import services
+from services import create_session_service
+from services.health import process_memory
+import routes.mcp
+
+
+def cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def run(connections: int, idle: float) -> None:
+    async def always_valid(api_key: str) -> bool:
+        return True
+
+    # 每个连接都会打印会话日志，基准中屏蔽
+    logging.disable(logging.INFO)
+    routes.mcp.verify_api_key = always_valid
+    services["session_service"] = create_session_service()
+
+    # 所有连接共用一个永不触发的事件，客户端既不断开也不发送数据
+    never = anyio.Event()
+
+    async def receive():
+        await never.wait()
+
+    async def send(message):
+        pass
+
+    def make_scope(i: int) -> dict:
+        return {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/sa_tools_idle_{i:06d}/sse",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 10000 + i % 50000),
+            "server": ("127.0.0.1", 8000),
+        }
+
+    async def connect(i: int) -> None:
+        scope = make_scope(i)
+        request = Request(scope, receive, send)
+        await routes.mcp.handle_sse(request, f"sa_tools_idle_{i:06d}")
+
+    gc.collect()
+    rss_before = process_memory()["rss"]
+    cpu_before = cpu_time()
+    start = time.perf_counter()
+
+    async with anyio.create_task_group() as tg:
+        for i in range(connections):
+            tg.start_soon(connect, i)
+        # 让所有连接完成建立并发送endpoint事件
+        await anyio.sleep(0)
+        while len(routes.mcp.sse.session_stats()) < connections:
+            await anyio.sleep(0.05)
+
+        connect_elapsed = time.perf_counter() - start
+        cpu_connect = cpu_time() - cpu_before
+
+        await anyio.sleep(idle)
+        gc.collect()
+        rss_after = process_memory()["rss"]
+        cpu_total = cpu_time() - cpu_before
+
+        tg.cancel_scope.cancel()
+
+    print(f"connections:          {connections}")
+    print(f"connect wall time:    {connect_elapsed:.2f}s")
+    print(f"rss before/after:     {rss_before / 2**20:.1f} MiB / {rss_after / 2**20:.1f} MiB")
+    print(f"rss per connection:   {(rss_after - rss_before) / connections / 1024:.2f} KiB")
+    print(f"cpu per connect:      {cpu_connect / connections * 1e6:.1f} us")
+    print(f"idle cpu per conn/s:  {(cpu_total - cpu_connect) / connections / idle * 1e6:.2f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="空闲SSE连接内存/CPU基准")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--idle", type=float, default=5.0, help="建立连接后保持空闲的秒数")
+    args = parser.parse_args()
+    anyio.run(run, args.connections, args.idle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+SessionService微基准
+
+按给定规模向临时SQLite文件批量写入合成的api_keys/sessions数据，然后测量
+create_session、get_api_key_by_session_id、update_session_access和
+get_sessions_by_api_key的单次延迟，以及通过SQLAlchemy事件钩子统计的
+每次操作发出的SQL语句数和提交次数。
+
+每个API密钥恰好写入sessions_per_key个会话（不超过MAX_SESSIONS_PER_KEY），查询类操作
+只访问写入的会话；create_session最后测量，每次都会淘汰所选密钥最旧的会话，因此
+语句数和提交次数与迭代次数无关。
+
+结果与benchmarks/baselines/session_service.json中的基线比较：语句数或提交
+次数增加、或p50延迟超出容差即视为回归，进程以状态码1退出。基线记录了生成它的
+iterations和sessions_per_key，参数不一致或某个规模没有基线时拒绝比较并以状态码2退出。
+
+用法:
+    python -m benchmarks.session_service [--sizes 1000,10000,100000]
+    python -m benchmarks.session_service --sizes 1000000
+    python -m benchmarks.session_service --update-baseline [--iterations 200]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from config import MAX_SESSIONS_PER_KEY
+from database.db import Base
+from models.session import ApiKey, Session
+from services.session import SessionService
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "session_service.json"
+SEED_CHUNK = 10000
+
+
+class QueryCounter:
+    """通过引擎事件统计SQL语句数和提交次数"""
+
+    def __init__(self, engine: Engine):
+        self.queries = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def reset(self) -> None:
+        self.queries = 0
+        self.commits = 0
+
+
+def seed(engine: Engine, rows: int, sessions_per_key: int) -> int:
+    """
+    批量写入合成数据，每个API密钥恰好拥有sessions_per_key个会话
+
+    Args:
+        engine: 数据库引擎
+        rows: 会话行数（向下取整为sessions_per_key的倍数）
+        sessions_per_key: 每个API密钥的会话数
+
+    Returns:
+        API密钥数量
+    """
+    keys = max(1, rows // sessions_per_key)
+    rows = keys * sessions_per_key
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        for start in range(0, keys, SEED_CHUNK):
+            conn.execute(
+                insert(ApiKey),
+                [
+                    {"id": i + 1, "key": key_name(i), "created_at": now, "last_used_at": now}
+                    for i in range(start, min(keys, start + SEED_CHUNK))
+                ],
+            )
+        for start in range(0, rows, SEED_CHUNK):
+            conn.execute(
+                insert(Session),
+                [
+                    {
+                        "session_id": session_name(i),
+                        "api_key_id": i % keys + 1,
+                        "created_at": now - timedelta(seconds=rows - i),
+                        "last_accessed": now - timedelta(seconds=rows - i),
+                    }
+                    for i in range(start, min(rows, start + SEED_CHUNK))
+                ],
+            )
+    return keys
+
+
+def key_name(i: int) -> str:
+    return f"sa_tools_bench_{i:08d}"
+
+
+def session_name(i: int) -> str:
+    return f"{i:032x}"
+
+
+def run_size(rows: int, sessions_per_key: int, iterations: int, workdir: Path) -> Dict[str, Dict[str, float]]:
+    """在一个规模下测量各操作，返回 操作名 -> 指标"""
+    engine = create_engine(
+        f"sqlite:///{workdir / f'bench_{rows}.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    keys = seed(engine, rows, sessions_per_key)
+    seeded = keys * sessions_per_key
+
+    counter = QueryCounter(engine)
+    service = SessionService(sessionmaker(autocommit=False, autoflush=False, bind=engine)())
+    rng = random.Random(rows)
+    new_ids = iter(range(seeded, seeded + iterations + 1))
+
+    # create_session会淘汰已有会话，放在最后，保证之前的查询都命中写入的行
+    operations: Dict[str, Callable[[], Any]] = {
+        "get_api_key_by_session_id": lambda: service.get_api_key_by_session_id(
+            session_name(rng.randrange(seeded))
+        ),
+        "update_session_access": lambda: service.update_session_access(
+            session_name(rng.randrange(seeded))
+        ),
+        "get_sessions_by_api_key": lambda: service.get_sessions_by_api_key(
+            key_name(rng.randrange(keys))
+        ),
+        "create_session": lambda: service.create_session(
+            key_name(rng.randrange(keys)), session_name(next(new_ids))
+        ),
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, operation in operations.items():
+        # 预热一次，排除首次编译语句等一次性开销
+        operation()
+        counter.reset()
+        latencies: List[float] = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - start)
+            # 不让ORM身份映射随迭代增长影响后续测量
+            service.db.expunge_all()
+
+        latencies.sort()
+        results[name] = {
+            "p50_ms": round(statistics.median(latencies) * 1000, 4),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 4),
+            "queries": round(counter.queries / iterations, 2),
+            "commits": round(counter.commits / iterations, 2),
+        }
+
+    service.close()
+    engine.dispose()
+    return results
+
+
+def settings_mismatch(settings: Dict[str, int], baseline: Dict[str, Any]) -> Optional[str]:
+    """基线的生成参数与本次不一致时返回说明"""
+    expected = baseline.get("settings")
+    if expected != settings:
+        return f"基线参数 {expected} 与本次参数 {settings} 不一致"
+    return None
+
+
+def missing_entries(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """本次运行中基线里没有的规模（或规模下的操作）"""
+    sizes = baseline.get("sizes", {})
+    missing = []
+    for size, operations in results.items():
+        if size not in sizes:
+            missing.append(size)
+            continue
+        missing.extend(f"{size}/{name}" for name in operations if name not in sizes[size])
+    return missing
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    latency_tolerance: float,
+) -> List[str]:
+    """与基线比较，返回回归描述列表"""
+    regressions = []
+    for size, operations in results.items():
+        for name, metrics in operations.items():
+            expected = baseline[size][name]
+            for metric in ("queries", "commits"):
+                if metrics[metric] > expected[metric]:
+                    regressions.append(
+                        f"{size} rows {name}: {metric} {metrics[metric]} > baseline {expected[metric]}"
+                    )
+            limit = expected["p50_ms"] * (1 + latency_tolerance)
+            if metrics["p50_ms"] > limit:
+                regressions.append(
+                    f"{size} rows {name}: p50 {metrics['p50_ms']}ms > {limit:.4f}ms "
+                    f"(baseline {expected['p50_ms']}ms +{latency_tolerance:.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SessionService微基准")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="逗号分隔的会话行数")
+    parser.add_argument(
+        "--sessions-per-key", type=int, default=MAX_SESSIONS_PER_KEY, help="每个API密钥的会话数"
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--latency-tolerance", type=float, default=1.0, help="p50延迟相对基线允许的增幅，1.0表示两倍"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线中对应规模")
+    args = parser.parse_args()
+    if not 0 < args.sessions_per_key <= MAX_SESSIONS_PER_KEY:
+        parser.error(f"--sessions-per-key必须在1到MAX_SESSIONS_PER_KEY({MAX_SESSIONS_PER_KEY})之间")
+    settings = {"iterations": args.iterations, "sessions_per_key": args.sessions_per_key}
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            results[str(rows)] = run_size(rows, args.sessions_per_key, args.iterations, Path(tmp))
+
+    print(f"{'rows':>9} {'operation':<28}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'commits':>9}")
+    for size, operations in results.items():
+        for name, metrics in operations.items():
+            print(
+                f"{size:>9} {name:<28}{metrics['p50_ms']:>10.3f}{metrics['p95_ms']:>10.3f}"
+                f"{metrics['queries']:>9.2f}{metrics['commits']:>9.2f}"
+            )
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+
+    mismatch = settings_mismatch(settings, baseline)
+
+    if args.update_baseline:
+        # 参数变化后旧基线的各规模都不可比，整体替换
+        sizes_baseline = {} if mismatch else baseline.get("sizes", {})
+        sizes_baseline.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({"settings": settings, "sizes": sizes_baseline}, indent=2, sort_keys=True) + "\n"
+        )
+        print(f"基线已更新: {args.baseline}")
+        return 0
+
+    if mismatch:
+        print(f"\n无法比较: {mismatch}，请使用相同参数运行或用--update-baseline重新生成基线")
+        return 2
+
+    missing = missing_entries(results, baseline)
+    if missing:
+        print(f"\n无法比较: 基线中没有 {', '.join(missing)}，请用--update-baseline生成")
+        return 2
+
+    regressions = compare(results, baseline["sizes"], args.latency_tolerance)
+    if regressions:
+        print("\n性能回归:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\n未发现回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+会话存储后端对比基准
+
+先对每个后端运行同一组一致性检查，再测量各会话操作的吞吐量。
+
+用法:
+    python -m benchmarks.session_store [--sessions 5000] [--keys 500]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import MAX_SESSIONS_PER_KEY
+from database.db import Base
+from services.base import SessionStore
+from services.memory import MemorySessionService
+from services.session import SessionService
+
+
+def make_sqlite_store(path: Path) -> SessionStore:
+    """在临时文件上创建SQLite后端"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return SessionService(sessionmaker(autocommit=False, autoflush=False, bind=engine)())
+
+
+def check_conformance(store: SessionStore, limit: int) -> None:
+    """两个后端必须表现一致的行为"""
+    for i in range(limit + 2):
+        store.create_session("sa_tools_conformance_a", f"conf-a-{i}")
+    store.create_session("sa_tools_conformance_b", "conf-b-0")
+
+    # 超出每个密钥的上限后淘汰最旧的会话
+    sessions = store.get_sessions_by_api_key("sa_tools_conformance_a")
+    assert len(sessions) == limit, len(sessions)
+    assert store.get_session_by_id("conf-a-0") is None
+    assert sessions[0].session_id == f"conf-a-{limit + 1}"
+
+    assert store.get_api_key_by_session_id("conf-b-0") == "sa_tools_conformance_b"
+    assert store.get_api_key_by_session_id("missing") is None
+    assert store.update_session_access("conf-b-0") is True
+    assert store.update_session_access("missing") is False
+
+    # 访问后该会话变为最新
+    assert store.update_session_access("conf-a-2") is True
+    assert store.get_sessions_by_api_key("sa_tools_conformance_a")[0].session_id == "conf-a-2"
+
+    counts = {row["session_count"] for row in store.count_sessions_by_key()}
+    assert counts == {limit, 1}, counts
+    assert sum(1 for _ in store.iter_sessions(api_key="sa_tools_conformance_b")) == 1
+    assert sum(1 for _ in store.iter_sessions(min_age=3600)) == 0
+
+    assert store.delete_session("conf-b-0") is True
+    assert store.delete_session("conf-b-0") is False
+    assert store.delete_sessions(api_key="sa_tools_conformance_a", batch_size=2) == limit
+    assert sum(1 for _ in store.iter_sessions()) == 0
+
+
+def run_benchmark(store: SessionStore, sessions: int, keys: int) -> Dict[str, Tuple[int, float]]:
+    """测量各操作耗时，返回 操作名 -> (次数, 秒)"""
+    session_ids = [f"bench-{i:08d}" for i in range(sessions)]
+    api_keys = [f"sa_tools_bench_{i % keys:06d}" for i in range(sessions)]
+    results: Dict[str, Tuple[int, float]] = {}
+
+    def measure(name: str, count: int, fn: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        fn()
+        results[name] = (count, time.perf_counter() - start)
+
+    def create() -> None:
+        for session_id, api_key in zip(session_ids, api_keys):
+            store.create_session(api_key, session_id)
+
+    def lookup() -> None:
+        for session_id in session_ids:
+            store.get_api_key_by_session_id(session_id)
+
+    def update() -> None:
+        for session_id in session_ids:
+            store.update_session_access(session_id)
+
+    def list_by_key() -> None:
+        for i in range(keys):
+            store.get_sessions_by_api_key(f"sa_tools_bench_{i:06d}")
+
+    def delete() -> None:
+        for session_id in session_ids:
+            store.delete_session(session_id)
+
+    measure("create_session", sessions, create)
+    measure("get_api_key_by_session_id", sessions, lookup)
+    measure("update_session_access", sessions, update)
+    measure("get_sessions_by_api_key", keys, list_by_key)
+    measure("delete_session", sessions, delete)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="会话存储后端对比基准")
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--keys", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        factories: Dict[str, Callable[[], SessionStore]] = {
+            "sqlite": lambda: make_sqlite_store(Path(tmp) / "bench.db"),
+            "memory": MemorySessionService,
+        }
+
+        all_results = {}
+        for name, factory in factories.items():
+            store = factory()
+            check_conformance(store, limit=MAX_SESSIONS_PER_KEY)
+            all_results[name] = run_benchmark(store, args.sessions, args.keys)
+            store.close()
+
+    print(f"{'operation':<28}" + "".join(f"{name + ' ops/s':>16}" for name in all_results))
+    for op in next(iter(all_results.values())):
+        row = f"{op:<28}"
+        for results in all_results.values():
+            count, elapsed = results[op]
+            row += f"{count / elapsed:>16,.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
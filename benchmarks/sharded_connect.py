@@ -0,0 +1,78 @@
+"""
+分片会话存储连接吞吐基准
+
+模拟并发建立SSE连接时的会话持久化：与传输层一致，每次连接在工作线程中调用
+create_session，统计不同分片数下每秒能完成的连接数。每个分片数使用一组新的
+临时SQLite文件。
+
+用法:
+    python -m benchmarks.sharded_connect [--shards 1,2,4,8] [--connections 2000] [--concurrency 32] [--dir ./database]
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+
+from services.base import SessionStore
+from services.sharded import ShardedSessionService, shard_path
+
+
+async def connect_throughput(store: SessionStore, connections: int, concurrency: int, keys: int) -> float:
+    limiter = anyio.CapacityLimiter(concurrency)
+    counter = iter(range(connections))
+
+    async def worker() -> None:
+        for i in counter:
+            api_key = f"sa_tools_shard_{i % keys:06d}"
+            session_id = store.new_session_id(api_key)
+            await anyio.to_thread.run_sync(store.create_session, api_key, session_id, limiter=limiter)
+
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(worker)
+    return connections / (time.perf_counter() - start)
+
+
+async def run(
+    shard_counts: list[int], connections: int, concurrency: int, keys: int, directory: str | None
+) -> None:
+    logging.disable(logging.INFO)
+    print(f"connections: {connections}, concurrency: {concurrency}, api keys: {keys}")
+    print(f"{'shards':>6}{'connects/s':>14}{'speedup':>10}")
+
+    baseline = None
+    for shards in shard_counts:
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            store = ShardedSessionService.from_paths(
+                [shard_path(i, Path(tmp) / "session.db") for i in range(shards)]
+            )
+            rate = await connect_throughput(store, connections, concurrency, keys)
+            store.close()
+        baseline = baseline or rate
+        print(f"{shards:>6}{rate:>14,.0f}{rate / baseline:>9.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分片会话存储连接吞吐基准")
+    parser.add_argument("--shards", default="1,2,4,8", help="逗号分隔的分片数")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--dir", default=None, help="存放临时数据库文件的目录，应与生产环境使用同类磁盘")
+    args = parser.parse_args()
+    anyio.run(
+        run,
+        [int(n) for n in args.shards.split(",")],
+        args.connections,
+        args.concurrency,
+        args.keys,
+        args.dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
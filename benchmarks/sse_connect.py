@@ -0,0 +1,116 @@
+"""
+SSE连接建立延迟基准
+
+分别在普通模式和乐观连接模式下通过routes.mcp.handle_sse建立连接，测量：
+- 首字节时间：调用处理函数到发送出endpoint事件
+- 就绪时间：调用处理函数到会话可以处理入站消息（验证和持久化均已完成）
+
+上游验证使用固定延迟模拟一次网络往返，会话存储使用临时SQLite文件。
+
+用法:
+    python -m benchmarks.sse_connect [--connections 200] [--verify-latency 0.05]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import anyio
+from starlette.requests import Request
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["SESSION_BACKEND"] = "sqlite"
+os.environ["DB_PATH"] = os.path.join(_tmp.name, "bench.db")
+
+from database.db import services
+from services import create_session_service
+import routes.mcp
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def measure(optimistic: bool, connections: int, verify_latency: float) -> Dict[str, List[float]]:
+    async def slow_verify(api_key: str) -> bool:
+        await anyio.sleep(verify_latency)
+        return True
+
+    routes.mcp.verify_api_key = slow_verify
+    routes.mcp.SSE_OPTIMISTIC_CONNECT = optimistic
+
+    results: Dict[str, List[float]] = {"ttfb": [], "ready": []}
+
+    for i in range(connections):
+        disconnect = anyio.Event()
+        first_byte = anyio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_byte.set()
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/sa_tools_connect_{i:06d}/sse",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 10000 + i),
+            "server": ("127.0.0.1", 8000),
+        }
+
+        async with anyio.create_task_group() as tg:
+            start = time.perf_counter()
+            tg.start_soon(
+                routes.mcp.handle_sse, Request(scope, receive, send), f"sa_tools_connect_{i:06d}"
+            )
+            await first_byte.wait()
+            results["ttfb"].append(time.perf_counter() - start)
+
+            session = next(iter(routes.mcp.sse._sessions.values()))
+            await session.wait_verified()
+            results["ready"].append(time.perf_counter() - start)
+
+            disconnect.set()
+
+    return results
+
+
+async def run(connections: int, verify_latency: float) -> None:
+    logging.disable(logging.WARNING)
+    services["session_service"] = create_session_service()
+
+    print(f"verify latency: {verify_latency * 1000:.1f} ms, connections per mode: {connections}")
+    print(f"{'mode':<12}{'ttfb p50':>12}{'ttfb p95':>12}{'ready p50':>12}{'ready p95':>12}")
+    for optimistic in (False, True):
+        results = await measure(optimistic, connections, verify_latency)
+        row = f"{'optimistic' if optimistic else 'serial':<12}"
+        for name in ("ttfb", "ready"):
+            row += f"{statistics.median(results[name]) * 1000:>10.2f}ms"
+            row += f"{percentile(results[name], 0.95) * 1000:>10.2f}ms"
+        print(row)
+
+    services["session_service"].close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SSE连接建立延迟基准")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--verify-latency", type=float, default=0.05, help="模拟的上游验证往返秒数")
+    args = parser.parse_args()
+    anyio.run(run, args.connections, args.verify_latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+SSE出站编码基准
+
+对比旧路径（model_dump_json → dict → sse_starlette重新编码）与SseEncoder
+（pydantic/orjson后端）在小消息和大消息上的吞吐量与内存分配。
+
+- MB/s、events/s：每秒产出的SSE帧字节数和帧数
+- peak alloc/event：单次编码过程中tracemalloc观测到的峰值分配字节数
+
+用法:
+    python -m benchmarks.sse_encoder [--iterations 20000] [--large-size 262144]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import mcp.types as types
+from sse_starlette.sse import ensure_bytes
+
+from transport.encoder import SseEncoder
+
+
+def legacy_encode(message: types.JSONRPCMessage) -> bytes:
+    # 与改造前sse_writer的路径一致
+    return ensure_bytes(
+        {"event": "message", "data": message.model_dump_json(by_alias=True, exclude_none=True)},
+        "\r\n",
+    )
+
+
+def make_messages(large_size: int) -> Dict[str, types.JSONRPCMessage]:
+    small = types.JSONRPCMessage(
+        types.JSONRPCResponse(jsonrpc="2.0", id=1, result={})
+    )
+    large = types.JSONRPCMessage(
+        types.JSONRPCResponse(
+            jsonrpc="2.0",
+            id=2,
+            result=types.CallToolResult(
+                content=[types.TextContent(type="text", text="会话数据 " * (large_size // 13))],
+                isError=False,
+            ).model_dump(by_alias=True, exclude_none=True),
+        )
+    )
+    return {"small": small, "large": large}
+
+
+def throughput(encode: Callable[[types.JSONRPCMessage], bytes], message, iterations: int) -> float:
+    total = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        total += len(encode(message))
+    return total / (time.perf_counter() - start)
+
+
+def allocations(encode: Callable[[types.JSONRPCMessage], bytes], message) -> Dict[str, int]:
+    encode(message)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    frame = encode(message)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak": peak - before, "frame": len(frame)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SSE出站编码基准")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--large-size", type=int, default=256 * 1024, help="大消息文本的近似字节数")
+    args = parser.parse_args()
+
+    encoders: Dict[str, Callable[[types.JSONRPCMessage], bytes]] = {
+        "legacy": legacy_encode,
+        "pydantic": SseEncoder("pydantic").message,
+    }
+    orjson_encoder = SseEncoder("orjson")
+    if orjson_encoder.backend == "orjson":
+        encoders["orjson"] = orjson_encoder.message
+
+    messages = make_messages(args.large_size)
+    for name, encode in encoders.items():
+        for message in messages.values():
+            assert encode(message) == legacy_encode(message), name
+
+    print(f"{'payload':<8}{'encoder':<10}{'frame bytes':>13}{'MB/s':>10}{'events/s':>12}{'peak alloc/event':>18}")
+    for payload, message in messages.items():
+        iterations = args.iterations if payload == "small" else max(1, args.iterations // 100)
+        for name, encode in encoders.items():
+            rate = throughput(encode, message, iterations)
+            alloc = allocations(encode, message)
+            print(
+                f"{payload:<8}{name:<10}{alloc['frame']:>13,}{rate / 1e6:>10.1f}"
+                f"{rate / alloc['frame']:>12,.0f}{alloc['peak']:>18,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -8,11 +9,48 @@ load_dotenv()
 # 服务器配置
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
+# 工作进程数，大于1时预先导入应用后fork多个进程，通过SO_REUSEPORT共享端口
+WORKERS = int(os.getenv("WORKERS", "1"))
+# 工作进程之间转发消息、汇总统计所用Unix套接字的目录，默认优先放在用户私有的XDG_RUNTIME_DIR下
+WORKER_SOCKET_DIR = Path(
+    os.getenv("WORKER_SOCKET_DIR")
+    or Path(os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()) / f"fastapi-mcp-{PORT}"
+)
 
 # API验证配置
 API_URL = os.getenv("API_URL")
 API_KEY_PREFIX = os.getenv("API_KEY_PREFIX")
+VERIFY_FAILURE_THRESHOLD = int(os.getenv("VERIFY_FAILURE_THRESHOLD", "5"))
+VERIFY_RESET_TIMEOUT = float(os.getenv("VERIFY_RESET_TIMEOUT", "30"))
+# 乐观连接：密钥验证、会话持久化与SSE流建立并发执行
+SSE_OPTIMISTIC_CONNECT = os.getenv("SSE_OPTIMISTIC_CONNECT", "false").lower() in ("1", "true", "yes")
+
+# 请求体大小上限（字节）
+MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE", str(4 * 1024 * 1024)))
+
+# SSE出站消息的JSON序列化后端（pydantic 或 orjson，后者需要安装orjson）
+SSE_JSON_BACKEND = os.getenv("SSE_JSON_BACKEND", "pydantic")
 
 # 数据库配置
 DB_PATH = os.getenv("DB_PATH", Path(__file__).parent / "database" / "session.db")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
+
+# 会话存储配置（sqlite 或 memory）
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+# SQLite分片数，大于1时按API密钥哈希将会话分散到多个数据库文件
+SESSION_SHARDS = int(os.getenv("SESSION_SHARDS", "1"))
+MAX_SESSIONS_PER_KEY = int(os.getenv("MAX_SESSIONS_PER_KEY", "5"))
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "100000"))
+
+# 管理接口配置
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_BATCH_SIZE = int(os.getenv("ADMIN_BATCH_SIZE", "1000"))
+# 调试接口（采样分析、请求追踪），默认关闭，开启后同样需要管理令牌
+DEBUG_ROUTES = os.getenv("DEBUG_ROUTES", "false").lower() in ("1", "true", "yes")
+TRACE_CAPACITY = int(os.getenv("TRACE_CAPACITY", "1000"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# 健康检查配置
+HEALTH_DB_PROBE_TTL = float(os.getenv("HEALTH_DB_PROBE_TTL", "5"))
+HEALTH_LOOP_LAG_INTERVAL = float(os.getenv("HEALTH_LOOP_LAG_INTERVAL", "0.5"))
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "0.5"))
@@ -1,11 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from contextlib import contextmanager
 import os
 from pathlib import Path
 from config import DATABASE_URL
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, Optional
 
 # 全局服务容器
 services: Dict[str, Any] = {}
@@ -13,10 +14,12 @@ services: Dict[str, Any] = {}
 # 数据库基类
 Base: DeclarativeMeta = declarative_base()
 
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """创建SQLite数据库引擎（每个引擎拥有独立的连接池）"""
+    return create_engine(url, connect_args={"check_same_thread": False})
+
 # 创建数据库引擎
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_db_engine()
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -57,6 +60,6 @@ def get_db_context():
     finally:
         db.close()
 
-def init_db():
+def init_db(bind: Optional[Engine] = None):
     """初始化数据库"""
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    Base.metadata.create_all(bind=bind or engine) 
\ No newline at end of file
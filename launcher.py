@@ -0,0 +1,227 @@
+"""
+多进程启动器
+
+父进程预先导入应用并建立数据库表结构，然后fork出WORKERS个工作进程。每个工作进程
+各自创建设置了SO_REUSEPORT的监听套接字，由内核在进程间分配新连接；同时监听一个
+Unix套接字，用于接收其他进程转发的会话消息和统计查询。工作进程异常退出时自动重启。
+"""
+from pathlib import Path
+from typing import Dict, List
+import logging
+import os
+import signal
+import socket
+import stat
+import time
+
+import uvicorn
+from fastapi import FastAPI
+
+from config import HOST, PORT, WORKERS, WORKER_SOCKET_DIR
+from database.db import engine, services
+from services import create_session_service
+from services.worker import WorkerService, worker_socket_path
+
+logger = logging.getLogger(__name__)
+
+# 工作进程存活不足该时长就退出视为启动失败，重启前先等待，避免空转
+MIN_UPTIME = 1.0
+RESTART_DELAY = 1.0
+# 关闭时等待工作进程退出的时长，超时后强制结束
+SHUTDOWN_TIMEOUT = 30.0
+# 与uvicorn默认值一致
+BACKLOG = 2048
+
+
+def bind_reuseport(host: str, port: int) -> socket.socket:
+    """创建设置了SO_REUSEPORT的TCP监听套接字，多个进程可绑定同一端口"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    return sock
+
+
+def bind_unix(path: Path) -> socket.socket:
+    """创建仅当前用户可访问的Unix监听套接字"""
+    path.unlink(missing_ok=True)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(path))
+    os.chmod(path, 0o600)
+    sock.listen(BACKLOG)
+    return sock
+
+
+def ensure_private_dir(path: Path) -> None:
+    """
+    创建套接字目录，并确认它是当前用户独占的目录
+
+    套接字上传输管理令牌和转发的请求体。共享临时目录下的固定路径可能被其他本地用户
+    抢先创建并放入伪造的套接字，因此目录已存在时同样检查属主和权限。
+
+    Raises:
+        RuntimeError: 目录不是真实目录、不属于当前用户，或组/其他用户有访问权限
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise RuntimeError(f"套接字路径不是目录: {path}")
+    if st.st_uid != os.getuid():
+        raise RuntimeError(f"套接字目录不属于当前用户: {path}（属主uid={st.st_uid}）")
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        raise RuntimeError(
+            f"套接字目录权限过宽: {path}（{oct(stat.S_IMODE(st.st_mode))}），应为0o700"
+        )
+
+
+class WorkerSupervisor:
+    """
+    工作进程管理
+
+    父进程只负责fork、回收和重启工作进程，不处理请求，也不持有数据库连接。
+    """
+
+    def __init__(self, app: FastAPI, host: str, port: int, workers: int, socket_dir: Path):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.socket_dir = Path(socket_dir)
+        # pid -> 工作进程编号
+        self.children: Dict[int, int] = {}
+        # 工作进程编号 -> 最近一次启动时间
+        self.started_at: Dict[int, float] = {}
+        self.should_exit = False
+
+    def prepare(self) -> None:
+        """fork前的准备工作"""
+        ensure_private_dir(self.socket_dir)
+        # 在父进程中建表，避免多个工作进程同时对新数据库执行create_all
+        create_session_service().close()
+        # 释放父进程连接池中的连接，工作进程不继承任何打开的SQLite连接
+        engine.dispose()
+
+    def spawn(self, index: int) -> None:
+        """fork一个工作进程"""
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self.run_worker(index)
+                code = 0
+            except BaseException:
+                logger.exception(f"工作进程 {index} 异常退出")
+            finally:
+                os._exit(code)
+
+        self.children[pid] = index
+        self.started_at[index] = time.monotonic()
+        logger.info(f"启动工作进程 {index}: pid={pid}")
+
+    def run_worker(self, index: int) -> None:
+        """工作进程入口：uvicorn会安装自己的信号处理"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # 按SQLAlchemy对fork的建议，丢弃继承来的连接池而不关闭父进程的连接
+        engine.dispose(close=False)
+        services["worker_service"] = WorkerService(index, self.workers, self.socket_dir)
+
+        sockets = [
+            bind_reuseport(self.host, self.port),
+            bind_unix(worker_socket_path(self.socket_dir, index)),
+        ]
+        server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port))
+        server.run(sockets=sockets)
+
+    def handle_exit(self, signum, frame) -> None:
+        self.should_exit = True
+
+    def reap(self) -> List[int]:
+        """回收已退出的工作进程，返回其编号"""
+        exited = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            index = self.children.pop(pid, None)
+            if index is None:
+                continue
+            logger.warning(
+                f"工作进程 {index} 已退出: pid={pid}, 退出码={os.waitstatus_to_exitcode(status)}"
+            )
+            exited.append(index)
+        return exited
+
+    def run(self) -> None:
+        """启动所有工作进程并持续监控，收到SIGTERM/SIGINT后关闭"""
+        self.prepare()
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGINT, self.handle_exit)
+        logger.info(f"多进程模式: {self.workers} 个工作进程, 监听 {self.host}:{self.port}")
+
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while not self.should_exit:
+            for index in self.reap():
+                if time.monotonic() - self.started_at[index] < MIN_UPTIME:
+                    time.sleep(RESTART_DELAY)
+                if not self.should_exit:
+                    self.spawn(index)
+            time.sleep(0.2)
+
+        self.stop()
+
+    def stop(self) -> None:
+        """通知所有工作进程优雅退出，超时后强制结束"""
+        logger.info("正在关闭工作进程...")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+
+        for pid in list(self.children):
+            logger.warning(f"工作进程未在{SHUTDOWN_TIMEOUT}秒内退出，强制结束: pid={pid}")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.children.clear()
+
+        for index in range(self.workers):
+            worker_socket_path(self.socket_dir, index).unlink(missing_ok=True)
+        logger.info("所有工作进程已退出")
+
+
+def serve(
+    app: FastAPI,
+    host: str = HOST,
+    port: int = PORT,
+    workers: int = WORKERS,
+    socket_dir: Path = WORKER_SOCKET_DIR,
+) -> None:
+    """
+    以多进程模式运行应用
+
+    Args:
+        app: 已导入的FastAPI应用（在fork前导入，工作进程共享其只读内存页）
+        host: 监听地址
+        port: 监听端口
+        workers: 工作进程数
+        socket_dir: 工作进程间通信的Unix套接字目录
+    """
+    if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("多进程模式需要支持fork和SO_REUSEPORT的平台")
+    WorkerSupervisor(app, host, port, workers, socket_dir).run()
@@ -1,11 +1,13 @@
 from fastapi import FastAPI, Request
+import anyio
 import logging
 from contextlib import asynccontextmanager
 
 # 导入路由模块
-from config import HOST, PORT
-from database.db import init_db, get_db, services
-from services.session import SessionService
+from config import HOST, PORT, WORKERS
+from database.db import services
+from services import create_session_service
+from services.health import HealthService
 from routes import main_router
 
 # 初始化日志
@@ -21,21 +23,25 @@ async def lifespan(app: FastAPI):
     # 初始化应用
     logger.info("启动应用...")
     
-    # 初始化数据库和服务
-    init_db()
-    db = next(get_db())
-    services["session_service"] = SessionService(db)
+    # 初始化会话存储和服务
+    services["session_service"] = create_session_service()
+    services["health_service"] = HealthService()
     
     # 导入MCP相关组件
     from server import mcp_lifespan
     # 执行MCP生命周期初始化
-    async with mcp_lifespan(app):
+    async with mcp_lifespan(app), anyio.create_task_group() as tg:
+        # 后台测量事件循环延迟
+        tg.start_soon(services["health_service"].monitor_loop_lag)
         # yield控制权返回给FastAPI
         yield
+        tg.cancel_scope.cancel()
     
     # 应用关闭时清理资源
     if "session_service" in services:
-        services["session_service"].db.close()
+        services["session_service"].close()
+    if "worker_service" in services:
+        await services["worker_service"].aclose()
     services.clear()
     logger.info("应用已关闭")
 
@@ -56,6 +62,12 @@ from routes.mcp import message_mount
 app.router.routes.append(message_mount)
 
 def main():
+    if WORKERS > 1:
+        # 应用已在fork前导入，工作进程共享这部分内存
+        from launcher import serve
+        serve(app, host=HOST, port=PORT, workers=WORKERS)
+        return
+
     import uvicorn
     uvicorn.run(app, host=HOST, port=PORT)
 
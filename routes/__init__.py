@@ -3,13 +3,24 @@
 
 from fastapi import APIRouter
 
+from config import DEBUG_ROUTES
+
 # 创建主路由
 main_router = APIRouter()
 
 # 导入其他路由模块
 from routes.mcp import router as mcp_router
 from routes.session import router as session_router
+from routes.admin import router as admin_router
+from routes.health import router as health_router
 
 # 包含其他路由模块
 main_router.include_router(mcp_router)
 main_router.include_router(session_router)
+main_router.include_router(admin_router)
+main_router.include_router(health_router)
+
+# 调试接口默认不挂载
+if DEBUG_ROUTES:
+    from routes.debug import router as debug_router
+    main_router.include_router(debug_router)
@@ -0,0 +1,145 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional
+import json
+import anyio
+from auth.admin import require_admin
+from config import ADMIN_BATCH_SIZE
+from database.db import services
+from services.base import SessionStore
+from routes.mcp import sse
+
+# 创建路由器（所有接口都需要管理令牌）
+router = APIRouter(
+    prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)]
+)
+
+
+def get_session_service() -> SessionStore:
+    """获取会话服务，未启动时返回503"""
+    session_service = services.get("session_service")
+    if not session_service:
+        raise HTTPException(status_code=503, detail="会话服务未启动")
+    return session_service
+
+
+def ndjson(rows: Iterator[Dict[str, Any]], batch_size: int = ADMIN_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    将字典迭代器编码为NDJSON，每batch_size行合并为一个块
+
+    StreamingResponse对同步迭代器的每一项都要切换一次线程池，按批产出避免逐行切换。
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode()
+
+
+@router.get("/sessions")
+def list_sessions(
+    api_key: Optional[str] = Query(None, description="按API密钥过滤"),
+    min_age: Optional[float] = Query(None, ge=0, description="最小空闲秒数"),
+    max_age: Optional[float] = Query(None, ge=0, description="最大空闲秒数"),
+    session_service: SessionStore = Depends(get_session_service),
+):
+    """以NDJSON流式返回会话列表"""
+    rows = session_service.iter_sessions(
+        api_key=api_key, min_age=min_age, max_age=max_age, batch_size=ADMIN_BATCH_SIZE
+    )
+    return StreamingResponse(ndjson(rows), media_type="application/x-ndjson")
+
+
+@router.get("/sessions/stats")
+def session_stats(
+    api_key: Optional[str] = Query(None, description="按API密钥过滤"),
+    min_age: Optional[float] = Query(None, ge=0, description="最小空闲秒数"),
+    max_age: Optional[float] = Query(None, ge=0, description="最大空闲秒数"),
+    session_service: SessionStore = Depends(get_session_service),
+):
+    """以NDJSON流式返回每个API密钥的会话数量"""
+    rows = session_service.count_sessions_by_key(
+        api_key=api_key, min_age=min_age, max_age=max_age, batch_size=ADMIN_BATCH_SIZE
+    )
+    return StreamingResponse(ndjson(rows), media_type="application/x-ndjson")
+
+
+@router.delete("/sessions")
+async def delete_sessions(
+    api_key: Optional[str] = Query(None, description="按API密钥过滤"),
+    min_age: Optional[float] = Query(None, ge=0, description="最小空闲秒数"),
+    max_age: Optional[float] = Query(None, ge=0, description="最大空闲秒数"),
+    all: bool = Query(False, description="未指定过滤条件时需显式确认删除全部"),
+    session_service: SessionStore = Depends(get_session_service),
+):
+    """按条件分批删除会话"""
+    if api_key is None and min_age is None and max_age is None and not all:
+        raise HTTPException(status_code=400, detail="请指定过滤条件，或使用all=true删除全部会话")
+
+    deleted = await run_in_threadpool(
+        session_service.delete_sessions,
+        api_key=api_key,
+        min_age=min_age,
+        max_age=max_age,
+        batch_size=ADMIN_BATCH_SIZE,
+    )
+    return {"deleted": deleted}
+
+
+def local_stats(include_sessions: bool = True) -> Dict[str, Any]:
+    """当前进程的运行时统计"""
+    health_service = services.get("health_service")
+    if not health_service:
+        raise HTTPException(status_code=503, detail="健康检查服务未启动")
+    stats = health_service.stats(sse.session_stats())
+    if not include_sessions:
+        stats.pop("sessions")
+    worker_service = services.get("worker_service")
+    if worker_service:
+        stats["worker"] = worker_service.index
+    return stats
+
+
+@router.get("/stats")
+async def runtime_stats(
+    sessions: bool = Query(True, description="是否包含各会话明细"),
+):
+    """运行时统计：打开的会话、各会话队列深度和内存占用"""
+    return local_stats(include_sessions=sessions)
+
+
+@router.get("/workers")
+async def worker_stats():
+    """汇总所有工作进程的运行时统计（不含会话明细），单进程模式下只有当前进程"""
+    worker_service = services.get("worker_service")
+    workers = [local_stats(include_sessions=False)]
+
+    if worker_service:
+        workers = [None] * worker_service.count
+        workers[worker_service.index] = local_stats(include_sessions=False)
+
+        async def fetch(index: int) -> None:
+            try:
+                workers[index] = await worker_service.fetch_stats(index)
+            except Exception as e:
+                # 进程正在重启时无法连接，单独标记而不影响其他进程
+                workers[index] = {"worker": index, "error": str(e)}
+
+        async with anyio.create_task_group() as tg:
+            for index in range(worker_service.count):
+                if index != worker_service.index:
+                    tg.start_soon(fetch, index)
+
+    alive = [stats for stats in workers if "error" not in stats]
+    return {
+        "workers": workers,
+        "totals": {
+            "workers": len(workers),
+            "alive": len(alive),
+            "open_sessions": sum(stats["open_sessions"] for stats in alive),
+            "rss": sum(stats["memory"]["rss"] for stats in alive),
+        },
+    }
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+import threading
+import anyio
+from auth.admin import require_admin
+from config import PROFILE_MAX_SECONDS
+from routes.mcp import sse
+from utils.profiler import ProfilerBusy, profile_loop
+
+# 创建路由器（仅在DEBUG_ROUTES开启时挂载，所有接口都需要管理令牌）
+router = APIRouter(
+    prefix="/debug", tags=["Debug"], dependencies=[Depends(require_admin)]
+)
+
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS, description="采样时长（秒）"),
+    interval_ms: float = Query(5, ge=1, le=1000, description="采样间隔（毫秒）"),
+    session_id: Optional[str] = Query(None, description="只保留该会话的样本"),
+):
+    """对事件循环线程采样，返回折叠栈（flamegraph.pl / speedscope格式）"""
+    loop = asyncio.get_running_loop()
+    try:
+        # 采样在工作线程中进行，事件循环照常处理请求
+        profiler = await anyio.to_thread.run_sync(
+            profile_loop, loop, threading.get_ident(), seconds, interval_ms / 1000
+        )
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="已有分析正在进行")
+    return PlainTextResponse(
+        profiler.collapsed(session_id),
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.folded"',
+            "X-Profile-Samples": str(profiler.sample_count),
+        },
+    )
+
+
+@router.get("/traces")
+async def traces(
+    session_id: Optional[str] = Query(None, description="按会话ID过滤"),
+    limit: int = Query(100, ge=1, le=10000, description="最多返回条数"),
+):
+    """最近完成的请求追踪，按时间倒序"""
+    if not sse.tracer.enabled:
+        raise HTTPException(status_code=404, detail="请求追踪未开启")
+    return sse.tracer.recent(session_id=session_id, limit=limit)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from database.db import services
+
+# 创建路由器
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """存活检查，不依赖任何外部资源"""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """就绪检查：数据库（缓存探测）、上游验证服务熔断状态和事件循环延迟"""
+    health_service = services.get("health_service")
+    if not health_service:
+        return JSONResponse({"ready": False, "checks": {}}, status_code=503)
+
+    result = await health_service.readiness()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
+from starlette.responses import Response
 from starlette.routing import Mount
 from typing import Any, Optional, List
+import functools
+import time
 from server import mcp, get_mcp_app, get_mcp_transport
 from auth.credential import verify_api_key
+from config import SSE_OPTIMISTIC_CONNECT
 from transport.sse import FastAPISseServerTransport
 from services.session import SessionService
 from database.db import services
@@ -26,6 +30,16 @@ if not mcp_transport or not isinstance(mcp_transport, FastAPISseServerTransport)
 else:
     sse = mcp_transport
 
+class SseHandledResponse(Response):
+    """SSE响应已由传输层直接写出，FastAPI不应再发送任何响应"""
+
+    def __init__(self) -> None:
+        self.background = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        return None
+
+
 @router.get("/{api_key:path}/sse")
 async def handle_sse(
     request: Request,
@@ -45,21 +59,36 @@ async def handle_sse(
     if not api_key:
         raise HTTPException(status_code=401, detail="未提供API密钥")
 
-    # 验证API密钥
-    is_valid = await verify_api_key(api_key)
-    if not is_valid:
-        raise HTTPException(status_code=401, detail="API密钥无效")
+    verify = None
+    verify_time = None
+    if SSE_OPTIMISTIC_CONNECT:
+        # 乐观连接：验证与连接建立并发执行，失败时由传输层关闭连接
+        verify = functools.partial(verify_api_key, api_key)
+    else:
+        # 验证API密钥
+        verify_start = time.perf_counter()
+        is_valid = await verify_api_key(api_key)
+        verify_time = time.perf_counter() - verify_start
+        if not is_valid:
+            raise HTTPException(status_code=401, detail="API密钥无效")
 
-    # API密钥验证通过，建立SSE连接
+    # 建立SSE连接
     async with sse.connect_sse(
-        request.scope, request.receive, request._send, api_key=api_key
-    ) as (
-        read_stream,
-        write_stream,
-    ):
+        request.scope,
+        request.receive,
+        request._send,
+        api_key=api_key,
+        verify=verify,
+        verify_time=verify_time,
+    ) as session:
+        # 空闲连接不启动MCP服务端循环，直到收到第一条消息
+        await session.activated.wait()
         await mcp_app._mcp_server.run(
-            read_stream, write_stream, mcp_app._mcp_server.create_initialization_options()
+            session.read_stream,
+            session.write_stream,
+            mcp_app._mcp_server.create_initialization_options(),
         )
+    return SseHandledResponse()
 
 # 获取消息挂载点
 message_mount = Mount("/messages", app=sse.handle_post_message)
@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
+import inspect
 from mcp.server.fastmcp import FastMCP
-from tools import get_current_sessions
+from tools import get_current_sessions, streaming_tool
 from fastapi import FastAPI
 from database.db import services
 import logging
@@ -11,8 +12,14 @@ logger = logging.getLogger(__name__)
 # 创建FastMCP服务器
 mcp = FastMCP("mcp-server")
 
+def register_tool(fn, **kwargs):
+    """注册工具函数，异步生成器工具自动包装为流式工具"""
+    if inspect.isasyncgenfunction(fn):
+        fn = streaming_tool(fn)
+    return mcp.tool(**kwargs)(fn)
+
 # 注册工具函数
-mcp.tool()(get_current_sessions)
+register_tool(get_current_sessions)
 
 @asynccontextmanager
 async def mcp_lifespan(app: FastAPI):
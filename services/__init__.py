@@ -1,2 +1,38 @@
 # 服务模块初始化文件
-# 这个文件使services目录成为一个Python包 
\ No newline at end of file
+# 这个文件使services目录成为一个Python包
+
+from config import SESSION_BACKEND, SESSION_SHARDS
+from services.base import SessionStore
+
+
+def create_session_service(
+    backend: str = SESSION_BACKEND, shards: int = SESSION_SHARDS
+) -> SessionStore:
+    """
+    根据配置创建会话存储后端
+
+    Args:
+        backend: 后端名称，sqlite 或 memory
+        shards: SQLite分片数，大于1时启用分片存储
+
+    Returns:
+        会话存储实例
+    """
+    if backend == "memory":
+        from services.memory import MemorySessionService
+        return MemorySessionService()
+
+    if backend == "sqlite" and shards > 1:
+        from services.sharded import ShardedSessionService, shard_path
+        return ShardedSessionService.from_paths([shard_path(i) for i in range(shards)])
+
+    if backend == "sqlite":
+        from database.db import init_db, get_db
+        from services.session import SessionService
+        init_db()
+        return SessionService(next(get_db()))
+
+    raise ValueError(f"未知的会话存储后端: {backend}")
+
+
+__all__ = ["SessionStore", "create_session_service"]
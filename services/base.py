@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+
+class SessionStore(ABC):
+    """
+    会话存储接口
+
+    SQLite/SQLAlchemy后端见services.session.SessionService，
+    纯内存后端见services.memory.MemorySessionService。
+    """
+
+    # 操作是否会阻塞（磁盘IO），为True时调用方应放到工作线程中执行
+    blocking: bool = False
+
+    def new_session_id(self, api_key: str) -> str:
+        """
+        为新会话生成ID
+
+        Args:
+            api_key: API密钥字符串
+
+        Returns:
+            32位十六进制会话ID
+        """
+        return uuid4().hex
+
+    @abstractmethod
+    def create_session(self, api_key: str, session_id: str) -> Any:
+        """创建新会话并关联到API密钥"""
+
+    @abstractmethod
+    def get_session_by_id(self, session_id: str) -> Optional[Any]:
+        """根据会话ID获取会话"""
+
+    @abstractmethod
+    def get_api_key_by_session_id(self, session_id: str) -> Optional[str]:
+        """根据会话ID获取API密钥，并更新访问时间"""
+
+    @abstractmethod
+    def get_sessions_by_api_key(self, api_key: str) -> List[Any]:
+        """根据API密钥获取关联的所有会话，按最后访问时间倒序"""
+
+    @abstractmethod
+    def update_session_access(self, session_id: str) -> bool:
+        """更新会话的最后访问时间"""
+
+    @abstractmethod
+    def delete_session(self, session_id: str) -> bool:
+        """删除会话"""
+
+    @abstractmethod
+    def revoke_session(self, session_id: str) -> bool:
+        """撤销create_session的写入：删除会话，该API密钥没有其他会话时一并删除密钥记录"""
+
+    @abstractmethod
+    def iter_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """按条件流式遍历会话"""
+
+    @abstractmethod
+    def count_sessions_by_key(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """按API密钥聚合会话数量"""
+
+    @abstractmethod
+    def delete_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """按条件批量删除会话，返回删除数量"""
+
+    def ping(self) -> bool:
+        """检查存储是否可用"""
+        return True
+
+    def close(self) -> None:
+        """释放存储占用的资源"""
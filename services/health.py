@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import resource
+import time
+
+import anyio
+
+from auth.credential import verifier_circuit
+from config import HEALTH_DB_PROBE_TTL, HEALTH_LOOP_LAG_INTERVAL, READY_MAX_LOOP_LAG
+from database.db import services
+from utils import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+def process_memory() -> Dict[str, int]:
+    """
+    获取当前进程的内存占用
+
+    Returns:
+        包含rss（当前常驻内存）和peak_rss（峰值常驻内存）的字典，单位为字节
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        rss = peak_rss
+    return {"rss": rss, "peak_rss": peak_rss}
+
+
+class HealthService:
+    """
+    健康检查服务
+
+    所有检查都只读取本地缓存的状态：数据库探测结果按TTL缓存，上游验证服务
+    只看熔断器状态，事件循环延迟由后台任务持续测量，探针本身不会触发外部调用。
+    """
+
+    def __init__(
+        self,
+        db_probe_ttl: float = HEALTH_DB_PROBE_TTL,
+        loop_lag_interval: float = HEALTH_LOOP_LAG_INTERVAL,
+        max_loop_lag: float = READY_MAX_LOOP_LAG,
+        circuit: CircuitBreaker = verifier_circuit,
+    ):
+        self.db_probe_ttl = db_probe_ttl
+        self.loop_lag_interval = loop_lag_interval
+        self.max_loop_lag = max_loop_lag
+        self.circuit = circuit
+        self.started_at = time.time()
+        # 启动时的常驻内存，作为估算每会话内存占用的基线
+        self.baseline_rss = process_memory()["rss"]
+        self.loop_lag = 0.0
+        self._db_ok: Optional[bool] = None
+        self._db_checked_at = 0.0
+        self._db_lock = anyio.Lock()
+
+    async def monitor_loop_lag(self) -> None:
+        """后台任务：测量定时睡眠的实际唤醒延迟作为事件循环延迟"""
+        while True:
+            start = time.monotonic()
+            await anyio.sleep(self.loop_lag_interval)
+            self.loop_lag = max(0.0, time.monotonic() - start - self.loop_lag_interval)
+
+    async def check_db(self) -> bool:
+        """
+        检查会话存储是否可用，结果在TTL内复用
+
+        Returns:
+            会话存储是否可用
+        """
+        if self._db_ok is not None and time.monotonic() - self._db_checked_at < self.db_probe_ttl:
+            return self._db_ok
+
+        async with self._db_lock:
+            # 等锁期间其他请求可能已经刷新了结果
+            if self._db_ok is not None and time.monotonic() - self._db_checked_at < self.db_probe_ttl:
+                return self._db_ok
+
+            session_service = services.get("session_service")
+            if not session_service:
+                self._db_ok = False
+            else:
+                self._db_ok = await anyio.to_thread.run_sync(session_service.ping)
+            self._db_checked_at = time.monotonic()
+            return self._db_ok
+
+    async def readiness(self) -> Dict[str, Any]:
+        """
+        汇总就绪检查结果
+
+        Returns:
+            包含ready标志和各项检查详情的字典
+        """
+        db_ok = await self.check_db()
+        circuit_state = self.circuit.state
+        loop_ok = self.loop_lag <= self.max_loop_lag
+
+        return {
+            "ready": db_ok and circuit_state != CircuitBreaker.OPEN and loop_ok,
+            "checks": {
+                "database": {"ok": db_ok, "age": round(time.monotonic() - self._db_checked_at, 3)},
+                "verifier": {"ok": circuit_state != CircuitBreaker.OPEN, "state": circuit_state},
+                "event_loop": {"ok": loop_ok, "lag": round(self.loop_lag, 6)},
+            },
+        }
+
+    def stats(self, sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        运行时统计信息
+
+        Args:
+            sessions: 传输层提供的各会话统计
+
+        Returns:
+            统计信息字典
+        """
+        memory = process_memory()
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started_at, 3),
+            "open_sessions": len(sessions),
+            "memory": {
+                **memory,
+                "baseline_rss": self.baseline_rss,
+                # 相对启动基线的进程内存增长按会话平均，是进程级估算而非单个会话的实际占用；
+                # 单个会话的积压情况见sessions中的queue_depth
+                "rss_per_session": (
+                    max(0, memory["rss"] - self.baseline_rss) // len(sessions) if sessions else None
+                ),
+            },
+            "event_loop_lag": round(self.loop_lag, 6),
+            "verifier_circuit": self.circuit.state,
+            "sessions": sessions,
+        }
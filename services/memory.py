@@ -0,0 +1,376 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import itertools
+import logging
+import threading
+import time
+
+from config import MAX_SESSIONS_PER_KEY, MEMORY_MAX_SESSIONS
+from services.base import SessionStore
+from utils import mask_api_key
+
+logger = logging.getLogger(__name__)
+
+
+def _utc(ts: float) -> datetime:
+    """时间戳转换为与ORM模型一致的naive UTC时间"""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+class ApiKeyRecord:
+    """内存中的API密钥记录"""
+
+    __slots__ = ("id", "key", "created_ts", "last_used_ts", "sessions")
+
+    def __init__(self, id: int, key: str, now: float):
+        self.id = id
+        self.key = key
+        self.created_ts = now
+        self.last_used_ts = now
+        # 会话ID -> 会话记录，按最后访问时间从旧到新排列
+        self.sessions: "OrderedDict[str, SessionRecord]" = OrderedDict()
+
+    @property
+    def created_at(self) -> datetime:
+        return _utc(self.created_ts)
+
+    @property
+    def last_used_at(self) -> datetime:
+        return _utc(self.last_used_ts)
+
+
+class SessionRecord:
+    """内存中的会话记录，属性与models.session.Session保持一致"""
+
+    __slots__ = ("session_id", "api_key", "created_ts", "last_accessed_ts")
+
+    def __init__(self, session_id: str, api_key: ApiKeyRecord, now: float):
+        self.session_id = session_id
+        self.api_key = api_key
+        self.created_ts = now
+        self.last_accessed_ts = now
+
+    @property
+    def api_key_id(self) -> int:
+        return self.api_key.id
+
+    @property
+    def created_at(self) -> datetime:
+        return _utc(self.created_ts)
+
+    @property
+    def last_accessed(self) -> datetime:
+        return _utc(self.last_accessed_ts)
+
+
+class MemorySessionService(SessionStore):
+    """
+    会话管理服务（纯内存后端）
+
+    会话按ID哈希查找，每个API密钥及全局各维护一个按访问时间排序的
+    OrderedDict，超出上限时从最旧的一端O(1)淘汰。进程重启后数据丢失，
+    适用于会话本身就是临时性的部署。
+    """
+
+    def __init__(
+        self,
+        max_sessions_per_key: int = MAX_SESSIONS_PER_KEY,
+        max_sessions: int = MEMORY_MAX_SESSIONS,
+    ):
+        self.max_sessions_per_key = max_sessions_per_key
+        self.max_sessions = max_sessions
+        # 会话ID -> 会话记录，按最后访问时间从旧到新排列
+        self._sessions: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self._api_keys: Dict[str, ApiKeyRecord] = {}
+        self._api_key_ids = itertools.count(1)
+        # 管理接口会在线程池中调用，需要与事件循环中的调用互斥
+        self._lock = threading.RLock()
+
+    def _get_or_create_api_key(self, key: str, now: float) -> ApiKeyRecord:
+        api_key = self._api_keys.get(key)
+        if api_key is None:
+            logger.info(f"创建新的API密钥: {mask_api_key(key)}")
+            api_key = ApiKeyRecord(next(self._api_key_ids), key, now)
+            self._api_keys[key] = api_key
+        else:
+            api_key.last_used_ts = now
+        return api_key
+
+    def _touch(self, session: SessionRecord, now: float) -> None:
+        session.last_accessed_ts = now
+        session.api_key.last_used_ts = now
+        self._sessions.move_to_end(session.session_id)
+        session.api_key.sessions.move_to_end(session.session_id)
+
+    def _remove(self, session: SessionRecord) -> None:
+        del self._sessions[session.session_id]
+        del session.api_key.sessions[session.session_id]
+        self._discard_api_key_if_empty(session.api_key)
+
+    def _discard_api_key_if_empty(self, api_key: ApiKeyRecord) -> None:
+        # 没有会话的密钥记录不再保留，内存占用受会话上限约束
+        if not api_key.sessions and self._api_keys.get(api_key.key) is api_key:
+            del self._api_keys[api_key.key]
+
+    def create_session(self, api_key: str, session_id: str) -> SessionRecord:
+        """
+        创建新会话并关联到API密钥
+
+        Args:
+            api_key: API密钥字符串
+            session_id: 会话ID
+
+        Returns:
+            新创建的会话记录
+        """
+        now = time.time()
+        with self._lock:
+            api_key_obj = self._get_or_create_api_key(api_key, now)
+
+            existing_session = self._sessions.get(session_id)
+            if existing_session:
+                logger.warning(f"会话ID已存在: {session_id}, 更新关联的API密钥")
+                if existing_session.api_key is not api_key_obj:
+                    previous_key = existing_session.api_key
+                    del previous_key.sessions[session_id]
+                    existing_session.api_key = api_key_obj
+                    api_key_obj.sessions[session_id] = existing_session
+                    self._discard_api_key_if_empty(previous_key)
+                self._touch(existing_session, now)
+                return existing_session
+
+            # 如果会话数量超过限制，淘汰最旧的会话
+            while len(api_key_obj.sessions) >= self.max_sessions_per_key:
+                _, oldest_session = next(iter(api_key_obj.sessions.items()))
+                logger.info(f"API密钥 {mask_api_key(api_key)} 的会话数量超过限制，删除最旧的会话: {oldest_session.session_id}")
+                self._remove(oldest_session)
+
+            while len(self._sessions) >= self.max_sessions:
+                _, oldest_session = next(iter(self._sessions.items()))
+                logger.info(f"内存会话数量超过上限，删除最旧的会话: {oldest_session.session_id}")
+                self._remove(oldest_session)
+
+            # 淘汰可能移除了该密钥的最后一个会话，重新登记同一条记录
+            self._api_keys[api_key] = api_key_obj
+            new_session = SessionRecord(session_id, api_key_obj, now)
+            self._sessions[session_id] = new_session
+            api_key_obj.sessions[session_id] = new_session
+            return new_session
+
+    def get_session_by_id(self, session_id: str) -> Optional[SessionRecord]:
+        """
+        根据会话ID获取会话
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            会话记录，如果不存在则返回None
+        """
+        return self._sessions.get(session_id)
+
+    def get_api_key_by_session_id(self, session_id: str) -> Optional[str]:
+        """
+        根据会话ID获取API密钥
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            API密钥字符串，如果不存在则返回None
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return None
+            self._touch(session, time.time())
+            return session.api_key.key
+
+    def get_sessions_by_api_key(self, api_key: str) -> List[SessionRecord]:
+        """
+        根据API密钥获取关联的所有会话
+
+        Args:
+            api_key: API密钥字符串
+
+        Returns:
+            会话列表，按最后访问时间倒序
+        """
+        with self._lock:
+            api_key_obj = self._api_keys.get(api_key)
+            if not api_key_obj:
+                return []
+            return list(reversed(api_key_obj.sessions.values()))
+
+    def update_session_access(self, session_id: str) -> bool:
+        """
+        更新会话的最后访问时间
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            是否成功更新
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return False
+            self._touch(session, time.time())
+            return True
+
+    def delete_session(self, session_id: str) -> bool:
+        """
+        删除会话
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            是否成功删除
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return False
+            self._remove(session)
+            return True
+
+    def revoke_session(self, session_id: str) -> bool:
+        """
+        撤销会话；没有会话的密钥记录在_remove中已被移除
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            是否删除了会话
+        """
+        return self.delete_session(session_id)
+
+    def _matching_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+    ) -> List[SessionRecord]:
+        """在锁内截取符合条件的会话快照"""
+        now = time.time()
+        with self._lock:
+            if api_key is not None:
+                api_key_obj = self._api_keys.get(api_key)
+                candidates = list(api_key_obj.sessions.values()) if api_key_obj else []
+            else:
+                candidates = list(self._sessions.values())
+
+        return [
+            session
+            for session in candidates
+            if (min_age is None or session.last_accessed_ts <= now - min_age)
+            and (max_age is None or session.last_accessed_ts >= now - max_age)
+        ]
+
+    def iter_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按条件遍历会话
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数
+            max_age: 最大空闲秒数
+            batch_size: 未使用，与SQL后端保持接口一致
+
+        Returns:
+            会话字典迭代器
+        """
+        for session in self._matching_sessions(api_key, min_age, max_age):
+            yield {
+                "session_id": session.session_id,
+                "api_key_id": session.api_key.id,
+                "api_key": mask_api_key(session.api_key.key),
+                "created_at": session.created_at.isoformat(),
+                "last_accessed": session.last_accessed.isoformat(),
+            }
+
+    def count_sessions_by_key(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按API密钥聚合会话数量
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数
+            max_age: 最大空闲秒数
+            batch_size: 未使用，与SQL后端保持接口一致
+
+        Returns:
+            每个API密钥的聚合结果迭代器
+        """
+        counts: Dict[int, List[Any]] = {}
+        for session in self._matching_sessions(api_key, min_age, max_age):
+            entry = counts.get(session.api_key.id)
+            if entry is None:
+                counts[session.api_key.id] = [session.api_key, 1, session.last_accessed_ts]
+            else:
+                entry[1] += 1
+                entry[2] = max(entry[2], session.last_accessed_ts)
+
+        for api_key_id in sorted(counts):
+            api_key_obj, session_count, last_accessed_ts = counts[api_key_id]
+            yield {
+                "api_key_id": api_key_id,
+                "api_key": mask_api_key(api_key_obj.key),
+                "session_count": session_count,
+                "last_accessed": _utc(last_accessed_ts).isoformat(),
+            }
+
+    def delete_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        按条件分批删除会话，每批持锁一次，避免长时间阻塞其他调用
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数
+            max_age: 最大空闲秒数
+            batch_size: 每批删除的会话数
+
+        Returns:
+            删除的会话总数
+        """
+        matched = self._matching_sessions(api_key, min_age, max_age)
+        deleted = 0
+
+        for start in range(0, len(matched), batch_size):
+            with self._lock:
+                for session in matched[start:start + batch_size]:
+                    # 快照之后可能已被删除或淘汰
+                    if self._sessions.get(session.session_id) is session:
+                        self._remove(session)
+                        deleted += 1
+
+        logger.info(f"批量删除会话: {deleted} 条")
+        return deleted
+
+    def close(self) -> None:
+        """清空内存中的会话"""
+        with self._lock:
+            self._sessions.clear()
+            self._api_keys.clear()
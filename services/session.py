@@ -1,19 +1,95 @@
-from sqlalchemy.orm import Session as DbSession
-from sqlalchemy import desc
-from datetime import datetime
-from typing import Optional, List, Tuple
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as DbSession, sessionmaker
+from sqlalchemy import desc, select, delete, func, text
+from datetime import datetime, timedelta
+from typing import Optional, List, Tuple, Iterator, Dict, Any, Callable, TypeVar
+import functools
 import logging
+import threading
 
+from config import MAX_SESSIONS_PER_KEY
 from models.session import ApiKey, Session
+from services.base import SessionStore
+from utils import mask_api_key
 
 logger = logging.getLogger(__name__)
 
-class SessionService:
-    """会话管理服务"""
+F = TypeVar("F", bound=Callable[..., Any])
+
+def synchronized(method: F) -> F:
+    """
+    为每次调用准备ORM会话，使服务可以同时在事件循环和工作线程中调用
+
+    共享会话模式下串行化所有调用；会话工厂模式下每次调用打开一个短生命周期的会话，
+    除exclusive标记的操作外调用之间互不阻塞，由连接池提供并发。嵌套调用复用外层的会话。
+    出错时回滚，避免一次锁超时等异常让会话停留在失败的事务中。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._session_factory is None:
+            with self._lock:
+                try:
+                    return method(self, *args, **kwargs)
+                except Exception:
+                    self._db.rollback()
+                    raise
+
+        if getattr(self._local, "db", None) is not None:
+            return method(self, *args, **kwargs)
+
+        db = self._session_factory()
+        self._local.db = db
+        try:
+            return method(self, *args, **kwargs)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            self._local.db = None
+            db.close()
+    return wrapper  # type: ignore[return-value]
+
+
+def exclusive(method: F) -> F:
+    """
+    串行化先查询后写入的操作，会话工厂模式下同样持锁
+
+    例如两个并发调用同时发现API密钥不存在而重复插入，或者同时清点会话数后各自淘汰。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper  # type: ignore[return-value]
+
+class SessionService(SessionStore):
+    """会话管理服务（SQLite/SQLAlchemy后端）"""
+
+    blocking = True
     
-    def __init__(self, db: DbSession):
-        self.db = db
+    def __init__(self, db: Optional[DbSession] = None, session_factory: Optional[sessionmaker] = None):
+        """
+        Args:
+            db: 所有调用共享的ORM会话
+            session_factory: 会话工厂，提供时每次调用使用独立的短生命周期会话（二者取一）
+        """
+        if (db is None) == (session_factory is None):
+            raise ValueError("db和session_factory必须且只能提供一个")
+        self._db = db
+        self._session_factory = session_factory
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.bind: Engine = db.get_bind() if db is not None else session_factory.kw["bind"]
+
+    @property
+    def db(self) -> DbSession:
+        """当前调用使用的ORM会话"""
+        if self._session_factory is None:
+            return self._db
+        return self._local.db
     
+    @exclusive
+    @synchronized
     def get_or_create_api_key(self, key: str) -> ApiKey:
         """
         获取或创建API密钥
@@ -39,6 +115,8 @@ class SessionService:
             
         return api_key
     
+    @exclusive
+    @synchronized
     def create_session(self, api_key: str, session_id: str) -> Session:
         """
         创建新会话并关联到API密钥
@@ -66,7 +144,7 @@ class SessionService:
         session_count = self.db.query(Session).filter(Session.api_key_id == api_key_obj.id).count()
         
         # 如果会话数量超过限制，删除最旧的会话
-        if session_count >= 5:
+        if session_count >= MAX_SESSIONS_PER_KEY:
             oldest_session = (
                 self.db.query(Session)
                 .filter(Session.api_key_id == api_key_obj.id)
@@ -89,6 +167,7 @@ class SessionService:
         
         return new_session
     
+    @synchronized
     def get_session_by_id(self, session_id: str) -> Optional[Session]:
         """
         根据会话ID获取会话
@@ -101,6 +180,7 @@ class SessionService:
         """
         return self.db.query(Session).filter(Session.session_id == session_id).first()
     
+    @synchronized
     def get_api_key_by_session_id(self, session_id: str) -> Optional[str]:
         """
         根据会话ID获取API密钥
@@ -132,6 +212,7 @@ class SessionService:
         
         return api_key.key
     
+    @synchronized
     def get_sessions_by_api_key(self, api_key: str) -> List[Session]:
         """
         根据API密钥获取关联的所有会话
@@ -154,6 +235,7 @@ class SessionService:
             .all()
         )
         
+    @synchronized
     def update_session_access(self, session_id: str) -> bool:
         """
         更新会话的最后访问时间
@@ -179,6 +261,7 @@ class SessionService:
         self.db.commit()
         return True
         
+    @synchronized
     def delete_session(self, session_id: str) -> bool:
         """
         删除会话
@@ -196,4 +279,229 @@ class SessionService:
             
         self.db.delete(session)
         self.db.commit()
-        return True 
\ No newline at end of file
+        return True
+
+    @exclusive
+    @synchronized
+    def revoke_session(self, session_id: str) -> bool:
+        """
+        撤销会话，API密钥没有其他会话时一并删除密钥记录
+
+        用于未通过验证的连接，避免任意带前缀的无效密钥在api_keys表中累积。
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            是否删除了会话
+        """
+        session = self.db.query(Session).filter(Session.session_id == session_id).first()
+
+        if not session:
+            return False
+
+        api_key_id = session.api_key_id
+        self.db.delete(session)
+        self.db.flush()
+        remaining = self.db.query(Session).filter(Session.api_key_id == api_key_id).count()
+        if not remaining:
+            self.db.query(ApiKey).filter(ApiKey.id == api_key_id).delete()
+        self.db.commit()
+        return True
+
+    def _session_filters(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+    ) -> list:
+        """
+        构建按API密钥和会话空闲时长过滤的SQL条件
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数（last_accessed早于now - min_age）
+            max_age: 最大空闲秒数（last_accessed晚于now - max_age）
+
+        Returns:
+            SQL条件列表
+        """
+        now = datetime.utcnow()
+        conditions = []
+        if api_key is not None:
+            conditions.append(
+                Session.api_key_id.in_(select(ApiKey.id).where(ApiKey.key == api_key))
+            )
+        if min_age is not None:
+            conditions.append(Session.last_accessed <= now - timedelta(seconds=min_age))
+        if max_age is not None:
+            conditions.append(Session.last_accessed >= now - timedelta(seconds=max_age))
+        return conditions
+
+    def iter_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按主键分页遍历会话，不会一次性加载全部结果
+
+        每页使用一个独立的短连接读取（WHERE id > 上一页末尾 ORDER BY id LIMIT batch_size），
+        读完即释放，调用方消费较慢时也不会长时间持有读锁而阻塞会话写入。
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数
+            max_age: 最大空闲秒数
+            batch_size: 每页行数
+
+        Returns:
+            会话字典迭代器
+        """
+        conditions = self._session_filters(api_key, min_age, max_age)
+        last_id = 0
+
+        while True:
+            stmt = (
+                select(
+                    Session.id,
+                    Session.session_id,
+                    Session.api_key_id,
+                    ApiKey.key,
+                    Session.created_at,
+                    Session.last_accessed,
+                )
+                .join(ApiKey, ApiKey.id == Session.api_key_id)
+                .where(Session.id > last_id, *conditions)
+                .order_by(Session.id)
+                .limit(batch_size)
+            )
+            with self.bind.connect() as conn:
+                rows = conn.execute(stmt).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+
+            for row in rows:
+                yield {
+                    "session_id": row.session_id,
+                    "api_key_id": row.api_key_id,
+                    "api_key": mask_api_key(row.key),
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                    "last_accessed": row.last_accessed.isoformat() if row.last_accessed else None,
+                }
+
+    def count_sessions_by_key(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        在SQL中按API密钥聚合会话数量
+
+        与iter_sessions相同，按API密钥主键分页，每页一个短连接。
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数
+            max_age: 最大空闲秒数
+            batch_size: 每页的API密钥数
+
+        Returns:
+            每个API密钥的聚合结果迭代器
+        """
+        conditions = self._session_filters(api_key, min_age, max_age)
+        last_id = 0
+
+        while True:
+            stmt = (
+                select(
+                    ApiKey.id,
+                    ApiKey.key,
+                    func.count(Session.id).label("session_count"),
+                    func.max(Session.last_accessed).label("last_accessed"),
+                )
+                .join(Session, Session.api_key_id == ApiKey.id)
+                .where(ApiKey.id > last_id, *conditions)
+                .group_by(ApiKey.id, ApiKey.key)
+                .order_by(ApiKey.id)
+                .limit(batch_size)
+            )
+            with self.bind.connect() as conn:
+                rows = conn.execute(stmt).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+
+            for row in rows:
+                last_accessed = row.last_accessed
+                if isinstance(last_accessed, datetime):
+                    last_accessed = last_accessed.isoformat()
+                yield {
+                    "api_key_id": row.id,
+                    "api_key": mask_api_key(row.key),
+                    "session_count": row.session_count,
+                    "last_accessed": last_accessed,
+                }
+
+    def delete_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        按条件分批删除会话，每批一个短事务，避免长时间锁库
+
+        Args:
+            api_key: API密钥字符串
+            min_age: 最小空闲秒数
+            max_age: 最大空闲秒数
+            batch_size: 每个事务删除的行数
+
+        Returns:
+            删除的会话总数
+        """
+        conditions = self._session_filters(api_key, min_age, max_age)
+        deleted = 0
+
+        while True:
+            with self.bind.begin() as conn:
+                ids = conn.execute(
+                    select(Session.id).where(*conditions).limit(batch_size)
+                ).scalars().all()
+                if not ids:
+                    break
+                conn.execute(delete(Session).where(Session.id.in_(ids)))
+            deleted += len(ids)
+
+        logger.info(f"批量删除会话: {deleted} 条")
+        return deleted
+
+    def ping(self) -> bool:
+        """
+        检查数据库是否可达
+
+        使用独立连接执行SELECT 1，可在线程池中调用。
+
+        Returns:
+            数据库是否可达
+        """
+        try:
+            with self.bind.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"数据库探测失败: {e}")
+            return False
+
+    def close(self) -> None:
+        """关闭共享的数据库会话（会话工厂模式下每次调用已自行关闭）"""
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
@@ -0,0 +1,179 @@
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import uuid4
+import logging
+import zlib
+
+from sqlalchemy.orm import sessionmaker
+
+from config import DB_PATH
+from database.db import create_db_engine, init_db
+from services.base import SessionStore
+from services.session import SessionService
+
+logger = logging.getLogger(__name__)
+
+# 会话ID的第一个字节用于记录分片编号
+MAX_SHARDS = 256
+
+
+def shard_path(index: int, db_path: Path = Path(DB_PATH)) -> Path:
+    """分片数据库文件路径，例如 session.db -> session_0.db"""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_{index}{db_path.suffix}")
+
+
+class ShardedSessionService(SessionStore):
+    """
+    分片会话管理服务（多个SQLite文件）
+
+    按API密钥的CRC32把api_keys/sessions分散到N个SQLite文件，每个分片拥有独立的
+    引擎和连接池，写入互不争用同一把SQLite写锁；分片内每次调用使用独立的短生命周期
+    ORM会话，同一分片上的并发调用由连接池提供连接。新会话ID的第一个字节记录分片编号，
+    按会话ID查询时直接路由到对应分片。
+    """
+
+    blocking = True
+
+    def __init__(self, shards: List[SessionService]):
+        if not 0 < len(shards) <= MAX_SHARDS:
+            raise ValueError(f"分片数必须在1到{MAX_SHARDS}之间: {len(shards)}")
+        self.shards = shards
+
+    @classmethod
+    def from_paths(cls, paths: List[Path]) -> "ShardedSessionService":
+        """
+        为每个数据库文件创建独立的引擎和会话服务
+
+        Args:
+            paths: 分片数据库文件路径列表
+
+        Returns:
+            分片会话服务
+        """
+        shards = []
+        for path in paths:
+            engine = create_db_engine(f"sqlite:///{path}")
+            init_db(bind=engine)
+            # 调用结束后会话即关闭，提交后不使返回的实体过期
+            session_factory = sessionmaker(
+                autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+            )
+            shards.append(SessionService(session_factory=session_factory))
+        logger.info(f"会话存储分片数: {len(shards)}")
+        return cls(shards)
+
+    def shard_index_for_key(self, api_key: str) -> int:
+        """API密钥所在的分片编号"""
+        return zlib.crc32(api_key.encode()) % len(self.shards)
+
+    def shard_index_for_session(self, session_id: str) -> Optional[int]:
+        """从会话ID中解析分片编号，不是本服务生成的ID时返回None"""
+        try:
+            index = int(session_id[:2], 16)
+        except ValueError:
+            return None
+        return index if index < len(self.shards) else None
+
+    def _shards_for_session(self, session_id: str) -> List[SessionService]:
+        index = self.shard_index_for_session(session_id)
+        return [self.shards[index]] if index is not None else self.shards
+
+    def new_session_id(self, api_key: str) -> str:
+        """
+        生成带分片编号前缀的会话ID
+
+        Args:
+            api_key: API密钥字符串
+
+        Returns:
+            32位十六进制会话ID，前两位为分片编号
+        """
+        return f"{self.shard_index_for_key(api_key):02x}{uuid4().hex[2:]}"
+
+    def create_session(self, api_key: str, session_id: str) -> Any:
+        return self.shards[self.shard_index_for_key(api_key)].create_session(api_key, session_id)
+
+    def get_session_by_id(self, session_id: str) -> Optional[Any]:
+        for shard in self._shards_for_session(session_id):
+            session = shard.get_session_by_id(session_id)
+            if session:
+                return session
+        return None
+
+    def get_api_key_by_session_id(self, session_id: str) -> Optional[str]:
+        for shard in self._shards_for_session(session_id):
+            api_key = shard.get_api_key_by_session_id(session_id)
+            if api_key:
+                return api_key
+        return None
+
+    def get_sessions_by_api_key(self, api_key: str) -> List[Any]:
+        return self.shards[self.shard_index_for_key(api_key)].get_sessions_by_api_key(api_key)
+
+    def update_session_access(self, session_id: str) -> bool:
+        return any(
+            shard.update_session_access(session_id) for shard in self._shards_for_session(session_id)
+        )
+
+    def delete_session(self, session_id: str) -> bool:
+        return any(shard.delete_session(session_id) for shard in self._shards_for_session(session_id))
+
+    def revoke_session(self, session_id: str) -> bool:
+        return any(shard.revoke_session(session_id) for shard in self._shards_for_session(session_id))
+
+    def _target_shards(self, api_key: Optional[str]) -> List[int]:
+        if api_key is not None:
+            return [self.shard_index_for_key(api_key)]
+        return list(range(len(self.shards)))
+
+    def iter_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """依次遍历各分片的会话，每行附带分片编号"""
+        return chain.from_iterable(
+            ({**row, "shard": index} for row in self.shards[index].iter_sessions(
+                api_key, min_age, max_age, batch_size
+            ))
+            for index in self._target_shards(api_key)
+        )
+
+    def count_sessions_by_key(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """依次聚合各分片，api_key_id只在分片内唯一，因此每行附带分片编号"""
+        return chain.from_iterable(
+            ({**row, "shard": index} for row in self.shards[index].count_sessions_by_key(
+                api_key, min_age, max_age, batch_size
+            ))
+            for index in self._target_shards(api_key)
+        )
+
+    def delete_sessions(
+        self,
+        api_key: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        return sum(
+            self.shards[index].delete_sessions(api_key, min_age, max_age, batch_size)
+            for index in self._target_shards(api_key)
+        )
+
+    def ping(self) -> bool:
+        return all(shard.ping() for shard in self.shards)
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+            shard.bind.dispose()
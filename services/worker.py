@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+
+import httpx
+
+from config import ADMIN_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# 会话ID的第二个字节用于记录所属工作进程（第一个字节留给分片编号）
+MAX_WORKERS = 256
+
+# 转发请求的标记头，收到转发请求的进程不再二次转发
+FORWARDED_HEADER = "x-mcp-forwarded-by"
+
+
+def worker_socket_path(socket_dir: Path, index: int) -> Path:
+    """工作进程内部通信用的Unix套接字路径"""
+    return Path(socket_dir) / f"worker_{index}.sock"
+
+
+class WorkerService:
+    """
+    多进程模式下当前工作进程的身份与进程间通信
+
+    SSE连接的内存流只存在于建立连接的进程中，而SO_REUSEPORT会把同一客户端的POST
+    分配到任意进程。因此新会话ID中记录所属进程编号，收到其他进程的会话消息时
+    通过该进程的Unix套接字原样转发。
+    """
+
+    def __init__(self, index: int, count: int, socket_dir: Path):
+        if not 0 < count <= MAX_WORKERS:
+            raise ValueError(f"工作进程数必须在1到{MAX_WORKERS}之间: {count}")
+        self.index = index
+        self.count = count
+        self.socket_dir = Path(socket_dir)
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    def socket_path(self, index: int) -> Path:
+        return worker_socket_path(self.socket_dir, index)
+
+    def tag_session_id(self, session_id: str) -> str:
+        """在会话ID的第二个字节写入当前进程编号"""
+        return f"{session_id[:2]}{self.index:02x}{session_id[4:]}"
+
+    def owner_of(self, session_id: str) -> Optional[int]:
+        """从会话ID中解析所属进程编号，无法解析时返回None"""
+        try:
+            index = int(session_id[2:4], 16)
+        except ValueError:
+            return None
+        return index if index < self.count else None
+
+    def _client(self, index: int) -> httpx.AsyncClient:
+        client = self._clients.get(index)
+        if client is None:
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=str(self.socket_path(index))),
+                base_url="http://worker",
+                timeout=30,
+            )
+            self._clients[index] = client
+        return client
+
+    async def forward(
+        self, index: int, path: str, body: bytes | bytearray, headers: Dict[str, str]
+    ) -> httpx.Response:
+        """
+        将POST请求转发给指定工作进程
+
+        Args:
+            index: 目标进程编号
+            path: 请求路径（含查询参数）
+            body: 请求体
+            headers: 需要保留的请求头
+
+        Returns:
+            目标进程的响应
+        """
+        return await self._client(index).post(
+            path,
+            content=bytes(body),
+            headers={**headers, FORWARDED_HEADER: str(self.index)},
+        )
+
+    async def fetch_stats(self, index: int) -> Dict[str, Any]:
+        """
+        获取指定工作进程的运行时统计（不含会话明细）
+
+        Args:
+            index: 目标进程编号
+
+        Returns:
+            统计信息字典
+        """
+        response = await self._client(index).get(
+            "/admin/stats",
+            params={"sessions": "false"},
+            headers={"x-admin-token": ADMIN_TOKEN or ""},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        """关闭到其他进程的连接"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
@@ -3,5 +3,6 @@ MCP工具函数包
 """
 
 from tools.session import get_current_sessions
+from tools.streaming import Progress, streaming_tool
 
-__all__ = ["get_current_sessions"] 
\ No newline at end of file
+__all__ = ["get_current_sessions", "Progress", "streaming_tool"]
@@ -0,0 +1,81 @@
+"""
+流式工具支持
+
+FastMCP只接受返回最终结果的工具函数。这里把异步生成器工具包装成普通异步工具：
+生成器每产出一段结果就立即通过会话的写入流发送给客户端，而不是等工具结束后
+一次性返回。
+
+- 产出 Progress 对象：发送 notifications/progress（客户端请求中带有progressToken时）
+- 产出其他值：作为部分结果发送 notifications/message，并自动上报进度
+"""
+import functools
+import inspect
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from mcp.server.fastmcp import Context
+
+
+class Progress:
+    """由流式工具产出，用于单独上报进度"""
+
+    __slots__ = ("progress", "total")
+
+    def __init__(self, progress: float, total: Optional[float] = None):
+        self.progress = progress
+        self.total = total
+
+
+def _find_context(args: tuple, kwargs: dict) -> Optional[Context]:
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, Context):
+            return value
+    return None
+
+
+def streaming_tool(
+    fn: Optional[Callable[..., AsyncIterator[Any]]] = None, *, collect: bool = True
+):
+    """
+    将异步生成器工具包装为FastMCP可注册的异步工具
+
+    工具函数需要声明Context参数才能发送通知；没有Context时部分结果只保留在最终结果中。
+
+    Args:
+        fn: 异步生成器函数
+        collect: 是否把所有部分结果拼接为最终结果返回。输出很大时设为False，
+            最终结果只包含段数摘要，内存占用不随输出增长
+
+    Returns:
+        包装后的异步工具函数
+    """
+    if fn is None:
+        return functools.partial(streaming_tool, collect=collect)
+
+    if not inspect.isasyncgenfunction(fn):
+        raise TypeError(f"streaming_tool只能包装异步生成器函数: {fn.__name__}")
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        ctx = _find_context(args, kwargs)
+        session = ctx.request_context.session if ctx and ctx._request_context else None
+
+        chunks: List[str] = []
+        count = 0
+        async for item in fn(*args, **kwargs):
+            if isinstance(item, Progress):
+                if session:
+                    await ctx.report_progress(item.progress, item.total)
+                continue
+
+            count += 1
+            if session:
+                await session.send_log_message(level="info", data=item, logger=fn.__name__)
+                await ctx.report_progress(count)
+            if collect or not session:
+                chunks.append(item if isinstance(item, str) else str(item))
+
+        if chunks:
+            return "\n".join(chunks)
+        return f"已流式输出 {count} 段结果"
+
+    return wrapper
@@ -2,6 +2,7 @@
 This module contains the transport layer for the MCP server.
 """
 
+from .encoder import SseEncoder
 from .sse import FastAPISseServerTransport
 
-__all__ = ["FastAPISseServerTransport"]
+__all__ = ["FastAPISseServerTransport", "SseEncoder"]
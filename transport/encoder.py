@@ -0,0 +1,75 @@
+"""
+SSE出站消息编码
+
+把JSONRPCMessage直接序列化为完整的SSE帧字节串。sse_starlette对bytes内容原样输出，
+因此每条消息只经历一次JSON序列化和一次拼接拷贝，不再经过str、dict和ServerSentEvent。
+"""
+import logging
+from typing import Callable
+
+import mcp.types as types
+
+logger = logging.getLogger(__name__)
+
+# SSE帧模板，与sse_starlette默认的\r\n分隔符一致
+SEP = b"\r\n"
+FRAME_END = SEP + SEP
+MESSAGE_HEADER = b"event: message" + SEP + b"data: "
+ENDPOINT_HEADER = b"event: endpoint" + SEP + b"data: "
+ERROR_HEADER = b"event: error" + SEP + b"data: "
+
+_message_serializer = types.JSONRPCMessage.__pydantic_serializer__
+
+
+def _dumps_pydantic(message: types.JSONRPCMessage) -> bytes:
+    # 直接输出bytes，跳过model_dump_json的str解码
+    return _message_serializer.to_json(message, by_alias=True, exclude_none=True)
+
+
+def _make_dumps_orjson() -> Callable[[types.JSONRPCMessage], bytes]:
+    import orjson
+
+    def _dumps_orjson(message: types.JSONRPCMessage) -> bytes:
+        return orjson.dumps(message.model_dump(by_alias=True, exclude_none=True, mode="json"))
+
+    return _dumps_orjson
+
+
+class SseEncoder:
+    """
+    SSE帧编码器
+
+    JSON输出不含换行符（字符串中的换行会被转义），因此每条消息都是单行data字段。
+    """
+
+    def __init__(self, backend: str = "pydantic") -> None:
+        """
+        Args:
+            backend: JSON序列化后端，pydantic 或 orjson（需要安装orjson）
+        """
+        self.backend = backend
+        if backend == "orjson":
+            try:
+                self._dumps = _make_dumps_orjson()
+            except ImportError:
+                logger.warning("未安装orjson，SSE编码回退到pydantic")
+                self.backend = "pydantic"
+                self._dumps = _dumps_pydantic
+        elif backend == "pydantic":
+            self._dumps = _dumps_pydantic
+        else:
+            raise ValueError(f"未知的JSON序列化后端: {backend}")
+
+    def message(self, message: types.JSONRPCMessage) -> bytes:
+        """编码message事件帧"""
+        return b"".join((MESSAGE_HEADER, self._dumps(message), FRAME_END))
+
+    @staticmethod
+    def endpoint(prefix: bytes, session_id: str) -> bytes:
+        """编码endpoint事件帧"""
+        return b"".join((ENDPOINT_HEADER, prefix, session_id.encode(), FRAME_END))
+
+    @staticmethod
+    def error(data: str) -> bytes:
+        """编码error事件帧，data中不能包含换行"""
+        return b"".join((ERROR_HEADER, data.encode(), FRAME_END))
@@ -1,10 +1,10 @@
 import logging
 from contextlib import asynccontextmanager
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 from urllib.parse import quote
 from uuid import UUID, uuid4
 import json
-import copy
+import time
 
 import anyio
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
@@ -16,13 +16,87 @@ from starlette.types import Receive, Scope, Send
 from mcp.server.sse import SseServerTransport
 
 import mcp.types as types
+from config import DEBUG_ROUTES, MAX_BODY_SIZE, SSE_JSON_BACKEND, TRACE_CAPACITY
+from transport.encoder import SseEncoder
 from transport.types import JsonRpcRequest, JsonRpcMeta, JsonRpcParams
-from services.session import SessionService
+from services.base import SessionStore
+from services.worker import FORWARDED_HEADER, WorkerService
 from database.db import services
+from utils.trace import RequestTracer, current_session_id, traced
 
 logger = logging.getLogger(__name__)
 
 
+class SseSession:
+    """
+    单个SSE连接的状态记录
+
+    使用__slots__压缩每个连接的内存占用。入站/出站内存流在收到第一条消息时
+    才创建，从未发送消息的空闲连接只持有会话ID和一个激活事件。
+
+    乐观连接模式下verified在密钥验证和会话持久化完成后触发，rejected表示验证失败；
+    普通模式下连接建立前已完成验证，verified为None。
+    """
+
+    __slots__ = (
+        "session_id",
+        "activated",
+        "verified",
+        "rejected",
+        "read_stream",
+        "read_stream_writer",
+        "write_stream",
+        "write_stream_reader",
+    )
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        self.activated = anyio.Event()
+        self.verified: Optional[anyio.Event] = None
+        self.rejected = False
+        self.read_stream: Optional[MemoryObjectReceiveStream[types.JSONRPCMessage | Exception]] = None
+        self.read_stream_writer: Optional[MemoryObjectSendStream[types.JSONRPCMessage | Exception]] = None
+        self.write_stream: Optional[MemoryObjectSendStream[types.JSONRPCMessage]] = None
+        self.write_stream_reader: Optional[MemoryObjectReceiveStream[types.JSONRPCMessage]] = None
+
+    async def wait_verified(self) -> bool:
+        """
+        等待乐观连接模式下的验证结果
+
+        Returns:
+            会话是否通过验证
+        """
+        if self.verified is not None:
+            await self.verified.wait()
+        return not self.rejected
+
+    def activate(self) -> None:
+        """创建内存流并唤醒等待中的服务端循环和SSE输出"""
+        if self.activated.is_set():
+            return
+        self.read_stream_writer, self.read_stream = anyio.create_memory_object_stream(0)
+        self.write_stream, self.write_stream_reader = anyio.create_memory_object_stream(0)
+        self.activated.set()
+
+    def queue_depth(self) -> int:
+        """入站队列中等待服务端循环接收的消息数"""
+        if self.read_stream_writer is None:
+            return 0
+        stream_stats = self.read_stream_writer.statistics()
+        return stream_stats.current_buffer_used + stream_stats.tasks_waiting_send
+
+    def close(self) -> None:
+        """关闭已创建的内存流"""
+        for stream in (
+            self.read_stream,
+            self.read_stream_writer,
+            self.write_stream,
+            self.write_stream_reader,
+        ):
+            if stream is not None:
+                stream.close()
+
+
 class FastAPISseServerTransport(SseServerTransport):
 
     def __init__(self, endpoint: str) -> None:
@@ -31,13 +105,36 @@ class FastAPISseServerTransport(SseServerTransport):
         messages to the relative or absolute URL given.
         """
         super().__init__(endpoint)
+        # 会话ID(hex) -> 连接状态
+        self._sessions: dict[str, SseSession] = {}
+        # endpoint事件的公共前缀，避免每个连接重复格式化
+        self._endpoint_prefix = f"{quote(self._endpoint)}?session_id=".encode()
+        self._encoder = SseEncoder(SSE_JSON_BACKEND)
+        # 请求级追踪，仅在开启调试接口时记录
+        self.tracer = RequestTracer(enabled=DEBUG_ROUTES, capacity=TRACE_CAPACITY)
         logger.debug(f"FastAPISseServerTransport initialized with endpoint: {endpoint}")
 
     @property
-    def session_service(self) -> Optional[SessionService]:
+    def session_service(self) -> Optional[SessionStore]:
         """获取会话服务"""
         return services.get("session_service")
 
+    def session_stats(self) -> list[dict[str, Any]]:
+        """
+        获取当前打开的SSE会话及其入站队列深度
+
+        Returns:
+            会话统计列表
+        """
+        return [
+            {
+                "session_id": session.session_id,
+                "active": session.activated.is_set(),
+                "queue_depth": session.queue_depth(),
+            }
+            for session in list(self._sessions.values())
+        ]
+
     @asynccontextmanager
     async def connect_sse(
         self,
@@ -45,71 +142,158 @@ class FastAPISseServerTransport(SseServerTransport):
         receive: Receive,
         send: Send,
         api_key: str = "",
+        verify: Optional[Callable[[], Awaitable[bool]]] = None,
+        verify_time: Optional[float] = None,
     ):
+        """
+        建立SSE连接并产出连接状态记录
+
+        调用方应等待session.activated后再启动MCP服务端循环。客户端断开时
+        取消整个上下文，连同服务端循环一起退出。
+
+        传入verify时启用乐观连接：立即发送endpoint事件，同时并发执行密钥验证和
+        会话持久化；验证完成前入站消息被挂起，验证失败则发送error事件并关闭连接。
+        普通模式下调用方可通过verify_time传入已完成的验证耗时（秒），记入连接追踪。
+        """
         if scope["type"] != "http":
             logger.error("connect_sse received non-HTTP request")
             raise ValueError("connect_sse can only handle HTTP requests")
 
-        read_stream: MemoryObjectReceiveStream[types.JSONRPCMessage | Exception]
-        read_stream_writer: MemoryObjectSendStream[types.JSONRPCMessage | Exception]
+        session_service = self.session_service
+        # 由会话存储生成ID（分片存储会在ID中记录分片编号）
+        session_id = session_service.new_session_id(api_key) if session_service else uuid4().hex
+        # 多进程模式下记录所属工作进程，其他进程收到该会话的消息时转发过来
+        worker_service: Optional[WorkerService] = services.get("worker_service")
+        if worker_service is not None:
+            session_id = worker_service.tag_session_id(session_id)
+        session = SseSession(session_id)
+        self._sessions[session_id] = session
+
+        tracer = self.tracer
+        trace = tracer.start(session_id, None, "sse/connect")
+        if trace is not None and verify_time is not None:
+            trace.add("verify", verify_time)
+
+        if verify is None:
+            # 如果提供了API密钥，存储session_id和api_key的关系
+            with traced(trace, "db"):
+                await self._call_store(self._persist_session, session_service, api_key, session_id)
+            tracer.finish(trace)
+        else:
+            session.verified = anyio.Event()
+
+        logger.debug(f"创建会话: ID={session_id}")
+
+        encoder = self._encoder
+
+        async def event_stream():
+            # 直接产出编码好的SSE帧，sse_starlette对bytes不再二次编码
+            yield encoder.endpoint(self._endpoint_prefix, session_id)
+
+            if not await session.wait_verified():
+                yield encoder.error("API密钥无效")
+                return
+
+            await session.activated.wait()
+            async with session.write_stream_reader:
+                async for message in session.write_stream_reader:
+                    root = message.root
+                    if tracer.enabled and isinstance(root, (types.JSONRPCResponse, types.JSONRPCError)):
+                        request_trace = tracer.pop_pending(session_id, root.id)
+                        if request_trace is not None:
+                            # 生成器在帧写出后才恢复，send阶段包含编码和写出
+                            with request_trace.phase("send"):
+                                yield encoder.message(message)
+                            tracer.finish(request_trace)
+                            continue
+                    yield encoder.message(message)
+
+        async def persist_session():
+            with traced(trace, "db"):
+                await self._call_store(self._persist_session, session_service, api_key, session_id)
+
+        async def verify_session():
+            # 密钥验证与会话持久化（工作线程中）并发执行
+            async with anyio.create_task_group() as verify_tg:
+                verify_tg.start_soon(persist_session)
+                try:
+                    with traced(trace, "verify"):
+                        is_valid = await verify()
+                except Exception as e:
+                    logger.error(f"乐观连接验证出错: {e}")
+                    is_valid = False
+
+            if not is_valid:
+                logger.warning(f"乐观连接验证失败，关闭会话: {session_id}")
+                session.rejected = True
+                if api_key and session_service:
+                    # 连同为该无效密钥新建的密钥记录一起撤销
+                    await self._call_store(session_service.revoke_session, session_id)
+            session.verified.set()
+            tracer.finish(trace)
+
+        # 采样分析时按任务上下文中的会话ID归类，服务端循环派生的任务会继承
+        context_token = current_session_id.set(session_id)
+        try:
+            async with anyio.create_task_group() as tg:
 
-        write_stream: MemoryObjectSendStream[types.JSONRPCMessage]
-        write_stream_reader: MemoryObjectReceiveStream[types.JSONRPCMessage]
+                async def run_response():
+                    await EventSourceResponse(content=event_stream())(scope, receive, send)
+                    # 客户端已断开，取消服务端循环
+                    tg.cancel_scope.cancel()
 
-        read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
-        write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+                tg.start_soon(run_response)
+                if verify is not None:
+                    tg.start_soon(verify_session)
 
-        session_id = uuid4()
-        session_uri = f"{quote(self._endpoint)}?session_id={session_id.hex}"
-        self._read_stream_writers[session_id] = read_stream_writer
+                yield session
+        finally:
+            # 清理资源
+            logger.debug(f"清理会话资源: ID={session_id}")
+            self._sessions.pop(session_id, None)
+            session.close()
+            current_session_id.reset(context_token)
 
-        # 如果提供了API密钥，存储session_id和api_key的关系
-        session_service = self.session_service
-        if api_key and session_service:
-            try:
-                # 创建会话记录
-                session = session_service.create_session(
-                    api_key=api_key, session_id=session_id.hex
-                )
-                logger.debug(f"创建会话记录: session_id={session_id.hex}")
-            except Exception as e:
-                logger.error(f"存储会话关系失败: {e}")
-
-        logger.debug(f"创建会话: ID={session_id.hex}")
-
-        sse_stream_writer, sse_stream_reader = anyio.create_memory_object_stream[
-            dict[str, Any]
-        ](0)
-
-        async def sse_writer():
-            async with sse_stream_writer, write_stream_reader:
-                await sse_stream_writer.send({"event": "endpoint", "data": session_uri})
-
-                async for message in write_stream_reader:
-                    await sse_stream_writer.send(
-                        {
-                            "event": "message",
-                            "data": message.model_dump_json(
-                                by_alias=True, exclude_none=True
-                            ),
-                        }
-                    )
+    async def _call_store(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        调用会话存储方法，会阻塞的后端（SQLite）放到工作线程中执行
 
-        async with anyio.create_task_group() as tg:
-            response = EventSourceResponse(
-                content=sse_stream_reader, data_sender_callable=sse_writer
-            )
-            tg.start_soon(response, scope, receive, send)
+        避免数据库提交阻塞事件循环，也让不同分片的写入可以并行。
 
-            yield (read_stream, write_stream)
+        Args:
+            func: 要调用的函数
+            *args: 位置参数
 
-            # 清理资源
-            if session_id in self._read_stream_writers:
-                logger.debug(f"清理会话资源: ID={session_id.hex}")
-                del self._read_stream_writers[session_id]
+        Returns:
+            函数返回值
+        """
+        session_service = self.session_service
+        if session_service is not None and session_service.blocking:
+            return await anyio.to_thread.run_sync(func, *args)
+        return func(*args)
+
+    def _persist_session(
+        self, session_service: Optional[SessionStore], api_key: str, session_id: str
+    ) -> None:
+        """
+        存储session_id和api_key的关系
+
+        Args:
+            session_service: 会话服务
+            api_key: API密钥
+            session_id: 会话ID
+        """
+        if not api_key or not session_service:
+            return
+        try:
+            # 创建会话记录（不持有返回的实体）
+            session_service.create_session(api_key=api_key, session_id=session_id)
+            logger.debug(f"创建会话记录: session_id={session_id}")
+        except Exception as e:
+            logger.error(f"存储会话关系失败: {e}")
 
     def _process_json_request(
-        self, body: bytes, session_id: UUID, api_key: str
+        self, body: bytes | bytearray, session_id: UUID, api_key: str
     ) -> types.JSONRPCMessage:
         """
         处理JSON请求，为tools/call方法添加会话信息
@@ -150,10 +334,8 @@ class FastAPISseServerTransport(SseServerTransport):
                     request.params.meta = meta
 
             # 转换回JSONRPCMessage格式 (使用by_alias=True确保meta字段输出为_meta)
-            modified_body = request.model_dump_json(by_alias=True).encode()
-
-            # 使用修改后的JSON创建消息对象
-            message = types.JSONRPCMessage.model_validate_json(modified_body)
+            # 直接校验字典，避免再序列化为JSON字符串后重新解析
+            message = types.JSONRPCMessage.model_validate(request.model_dump(by_alias=True))
             return message
 
         except json.JSONDecodeError as e:
@@ -165,7 +347,7 @@ class FastAPISseServerTransport(SseServerTransport):
             return self._process_json_request_fallback(body, session_id, api_key)
 
     def _process_json_request_fallback(
-        self, body: bytes, session_id: UUID, api_key: str
+        self, body: bytes | bytearray, session_id: UUID, api_key: str
     ) -> types.JSONRPCMessage:
         """
         处理JSON请求的备用方法，用于处理与Pydantic模型不匹配的情况
@@ -179,11 +361,8 @@ class FastAPISseServerTransport(SseServerTransport):
             处理后的JSONRPCMessage对象
         """
         try:
-            # 解析JSON为字典
-            json_data = json.loads(body)
-
-            # 创建修改后的JSON副本
-            modified_json = copy.deepcopy(json_data)
+            # 解析JSON为字典（新解析出的对象，可直接修改）
+            modified_json = json.loads(body)
 
             # 检查是否为tools/call方法
             if "method" in modified_json and modified_json["method"] == "tools/call":
@@ -206,16 +385,105 @@ class FastAPISseServerTransport(SseServerTransport):
                     # 保存回原始结构
                     modified_json["params"] = params
 
-            # 序列化回JSON
-            modified_body = json.dumps(modified_json).encode()
-
-            # 使用修改后的JSON创建消息对象
-            return types.JSONRPCMessage.model_validate_json(modified_body)
+            # 使用修改后的字典创建消息对象
+            return types.JSONRPCMessage.model_validate(modified_json)
 
         except Exception as e:
             logger.error(f"备用处理也失败: {e}")
             return types.JSONRPCMessage.model_validate_json(body)
 
+    async def _read_body(self, request: Request) -> Optional[bytearray]:
+        """
+        流式读取请求体，超过MAX_BODY_SIZE时提前终止
+
+        已知Content-Length时预先分配缓冲区，避免逐块拼接产生的拷贝；声明长度超过
+        MAX_BODY_SIZE时直接拒绝，不按客户端声明的大小分配内存。
+
+        Args:
+            request: Starlette请求对象
+
+        Returns:
+            请求体缓冲区，超出大小限制时返回None
+        """
+        content_length = request.headers.get("content-length")
+        expected = int(content_length) if content_length and content_length.isdigit() else None
+
+        if expected is not None and expected > MAX_BODY_SIZE:
+            return None
+
+        if expected is not None:
+            body = bytearray(expected)
+            view = memoryview(body)
+            received = 0
+            async for chunk in request.stream():
+                end = received + len(chunk)
+                if end > expected:
+                    # 实际数据多于声明长度，按超出限制处理
+                    return None
+                view[received:end] = chunk
+                received = end
+            view.release()
+            if received < expected:
+                del body[received:]
+            return body
+
+        body = bytearray()
+        async for chunk in request.stream():
+            body += chunk
+            if len(body) > MAX_BODY_SIZE:
+                return None
+        return body
+
+    def _session_owner(self, request: Request, session_id: str) -> Optional[int]:
+        """
+        会话属于其他工作进程时返回该进程编号
+
+        Args:
+            request: Starlette请求对象
+            session_id: 会话ID
+
+        Returns:
+            需要转发的目标进程编号，不需要转发时返回None
+        """
+        worker_service: Optional[WorkerService] = services.get("worker_service")
+        if worker_service is None or FORWARDED_HEADER in request.headers:
+            return None
+        owner = worker_service.owner_of(session_id)
+        return owner if owner != worker_service.index else None
+
+    async def _forward_post_message(
+        self, request: Request, owner: int, session_id: str, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """
+        将消息原样转发给持有SSE连接的工作进程，并返回其响应
+
+        Args:
+            request: Starlette请求对象
+            owner: 目标进程编号
+            session_id: 会话ID
+        """
+        body = await self._read_body(request)
+        if body is None:
+            logger.warning(f"请求体超过大小限制: {MAX_BODY_SIZE} 字节, 会话: {session_id}")
+            response = Response("Request body too large", status_code=413)
+            return await response(scope, receive, send)
+
+        headers = {}
+        content_type = request.headers.get("content-type")
+        if content_type:
+            headers["content-type"] = content_type
+        try:
+            forwarded = await services["worker_service"].forward(
+                owner, f"{request.url.path}?{request.url.query}", body, headers
+            )
+        except Exception as e:
+            logger.error(f"转发消息到工作进程{owner}失败: {e}")
+            response = Response("Could not find session", status_code=404)
+            return await response(scope, receive, send)
+
+        response = Response(forwarded.content, status_code=forwarded.status_code)
+        await response(scope, receive, send)
+
     async def handle_post_message(
         self, scope: Scope, receive: Receive, send: Send
     ) -> None:
@@ -229,34 +497,57 @@ class FastAPISseServerTransport(SseServerTransport):
 
         try:
             session_id = UUID(hex=session_id_param)
-
-            # 获取session_id关联的API密钥
-            api_key = None
-            session_service = self.session_service
-            if session_service:
-                try:
-                    # 更新会话访问时间
-                    session_service.update_session_access(session_id.hex)
-                    
-                    # 获取API密钥
-                    api_key = session_service.get_api_key_by_session_id(session_id.hex)
-                except Exception as e:
-                    logger.error(f"获取API密钥时出错: {e}")
-            else:
-                logger.warning("会话服务未设置，无法获取API密钥")
-
         except ValueError:
             logger.warning(f"无效的session_id: {session_id_param}")
             response = Response("Invalid session ID", status_code=400)
             return await response(scope, receive, send)
 
-        writer = self._read_stream_writers.get(session_id)
-        if not writer:
+        # 在读取请求体之前完成所有廉价检查，注定失败的请求不再解析；
+        # 大小检查先于转发，伪造其他进程会话ID的请求同样受限
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_SIZE:
+            logger.warning(f"请求体过大: {content_length} 字节, 会话: {session_id}")
+            response = Response("Request body too large", status_code=413)
+            return await response(scope, receive, send)
+
+        session = self._sessions.get(session_id.hex)
+        if not session:
+            owner = self._session_owner(request, session_id.hex)
+            if owner is not None:
+                return await self._forward_post_message(request, owner, session_id.hex, scope, receive, send)
             logger.warning(f"找不到会话: {session_id}")
             response = Response("Could not find session", status_code=404)
             return await response(scope, receive, send)
 
-        body = await request.body()
+        current_session_id.set(session.session_id)
+        trace = self.tracer.start(session.session_id, None)
+
+        # 乐观连接模式下挂起消息，直到密钥验证和会话持久化完成
+        if not await session.wait_verified():
+            logger.warning(f"会话未通过验证: {session_id}")
+            response = Response("Invalid API key", status_code=401)
+            return await response(scope, receive, send)
+
+        # 获取session_id关联的API密钥（同时更新会话访问时间）
+        api_key = None
+        session_service = self.session_service
+        if session_service:
+            try:
+                with traced(trace, "db"):
+                    api_key = await self._call_store(
+                        session_service.get_api_key_by_session_id, session_id.hex
+                    )
+            except Exception as e:
+                logger.error(f"获取API密钥时出错: {e}")
+        else:
+            logger.warning("会话服务未设置，无法获取API密钥")
+
+        parse_start = time.perf_counter()
+        body = await self._read_body(request)
+        if body is None:
+            logger.warning(f"请求体超过大小限制: {MAX_BODY_SIZE} 字节, 会话: {session_id}")
+            response = Response("Request body too large", status_code=413)
+            return await response(scope, receive, send)
 
         try:
             # 使用获取到的api_key作为path参数，如果获取失败则使用空字符串
@@ -265,7 +556,8 @@ class FastAPISseServerTransport(SseServerTransport):
             logger.error(f"消息解析失败: {err}")
             response = Response("Could not parse message", status_code=400)
             await response(scope, receive, send)
-            await writer.send(err)
+            session.activate()
+            await session.read_stream_writer.send(err)
             return
         except Exception as e:
             logger.error(f"处理请求时发生错误: {e}")
@@ -273,6 +565,16 @@ class FastAPISseServerTransport(SseServerTransport):
             await response(scope, receive, send)
             return
 
+        if trace is not None:
+            trace.add("parse", time.perf_counter() - parse_start)
+            trace.request_id = getattr(message.root, "id", None)
+            trace.method = getattr(message.root, "method", None)
+
         response = Response("Accepted", status_code=202)
         await response(scope, receive, send)
-        await writer.send(message)
+        # 第一条消息到达时才创建内存流并启动服务端循环
+        session.activate()
+        # 先登记再投递，服务端可能在send返回前就产出响应
+        self.tracer.wait_response(trace)
+        with traced(trace, "enqueue"):
+            await session.read_stream_writer.send(message)
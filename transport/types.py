@@ -9,6 +9,11 @@ class JsonRpcMeta(BaseModel):
     session_id: Optional[str] = None
     api_key: Optional[str] = None
 
+    # 保留客户端传入的其他字段（如progressToken）
+    model_config = {
+        "extra": "allow",
+    }
+
 
 class JsonRpcParams(BaseModel):
     """
@@ -3,5 +3,8 @@
 """
 
 from utils.api_utils import mask_api_key
+from utils.circuit_breaker import CircuitBreaker
+from utils.trace import RequestTracer
+from utils.profiler import SamplingProfiler
 
-__all__ = ["mask_api_key"] 
\ No newline at end of file
+__all__ = ["mask_api_key", "CircuitBreaker", "RequestTracer", "SamplingProfiler"]
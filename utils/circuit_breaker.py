@@ -0,0 +1,47 @@
+"""
+熔断器实现
+"""
+import time
+
+
+class CircuitBreaker:
+    """
+    简单的计数型熔断器
+
+    连续失败达到阈值后打开，打开期间直接拒绝调用；冷却时间过后进入半开状态，
+    放行试探调用，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+
+    @property
+    def state(self) -> str:
+        """当前状态，打开超过冷却时间后视为半开"""
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """是否允许发起调用"""
+        return self.state != self.OPEN
+
+    def record_success(self) -> None:
+        """记录一次成功调用"""
+        self.failures = 0
+        self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        self.failures += 1
+        if self._state != self.CLOSED or self.failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
@@ -0,0 +1,139 @@
+"""
+按需采样分析器
+
+在独立线程中按固定间隔读取目标线程（默认为事件循环线程）的调用栈，
+汇总为flamegraph.pl / speedscope可直接读取的折叠栈格式（"帧1;帧2;帧3 次数"）。
+采样时若事件循环正在运行某个任务，会读取该任务上下文中的会话ID，
+作为栈的根帧（session:<id>），以便与请求追踪对应。
+"""
+from collections import Counter
+from typing import Dict, Optional
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from utils.trace import current_session_id
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.sep.join(code.co_filename.rsplit(os.sep, 2)[-2:])
+    # 折叠栈格式以;和空格分隔，帧名中不能出现这两种字符
+    return f"{code.co_qualname}({filename}:{code.co_firstlineno})".replace(";", ",").replace(" ", "_")
+
+
+def _current_task_session(loop: Optional[asyncio.AbstractEventLoop]) -> Optional[str]:
+    if loop is None:
+        return None
+    try:
+        task = asyncio.current_task(loop)
+    except RuntimeError:
+        return None
+    if task is None:
+        return None
+    return task.get_context().get(current_session_id)
+
+
+class SamplingProfiler:
+    """
+    采样分析器
+
+    采样线程只在每次采样时短暂持有GIL读取栈帧，开销与采样频率成正比，
+    与请求量无关；分析结束后不留下任何钩子。
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        interval: float = 0.005,
+    ):
+        """
+        Args:
+            thread_id: 被采样线程的ident
+            loop: 该线程运行的事件循环，用于读取当前任务的会话ID
+            interval: 采样间隔（秒）
+        """
+        self.thread_id = thread_id
+        self.loop = loop
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    def sample(self) -> None:
+        """采样一次"""
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        session_id = _current_task_session(self.loop)
+        if session_id:
+            stack.append(f"session:{session_id}")
+        self.samples[";".join(reversed(stack))] += 1
+        self.sample_count += 1
+
+    def run(self, duration: float) -> None:
+        """在当前线程中采样指定时长（秒）"""
+        deadline = time.monotonic() + duration
+        next_at = time.monotonic()
+        while next_at < deadline:
+            self.sample()
+            next_at += self.interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def collapsed(self, session_id: Optional[str] = None) -> str:
+        """
+        输出折叠栈文本
+
+        Args:
+            session_id: 只保留该会话的样本
+
+        Returns:
+            每行一个"栈 次数"，按次数降序
+        """
+        samples: Dict[str, int] = self.samples
+        if session_id is not None:
+            prefix = f"session:{session_id};"
+            samples = {stack: count for stack, count in samples.items() if stack.startswith(prefix)}
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(samples.items(), key=lambda item: item[1], reverse=True)
+        )
+
+
+class ProfilerBusy(RuntimeError):
+    """已有分析正在进行"""
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_loop(
+    loop: asyncio.AbstractEventLoop,
+    thread_id: int,
+    duration: float,
+    interval: float,
+) -> SamplingProfiler:
+    """
+    对事件循环线程采样一段时间，同一时刻只允许一个分析
+
+    应在工作线程中调用（例如anyio.to_thread.run_sync），否则会阻塞被采样的事件循环。
+
+    Raises:
+        ProfilerBusy: 已有分析正在进行
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("已有分析正在进行")
+    try:
+        profiler = SamplingProfiler(thread_id, loop, interval)
+        profiler.run(duration)
+        return profiler
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,128 @@
+"""
+请求级追踪
+
+按会话ID和JSON-RPC请求ID记录一次请求在各阶段的耗时：
+verify（密钥验证）、db（会话存储）、parse（读取并解析请求体）、enqueue（投递给服务端循环）、
+tool（服务端处理直到产出响应）、send（编码并写出SSE帧）。
+"""
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Deque, Dict, Iterator, List, Optional, Tuple
+import time
+
+# 当前任务所属的会话ID，由SSE连接处理任务设置，服务端循环派生的任务会继承
+current_session_id: ContextVar[Optional[str]] = ContextVar("current_session_id", default=None)
+
+
+class Trace:
+    """单个请求的追踪记录"""
+
+    __slots__ = ("session_id", "request_id", "method", "started_at", "phases", "mark")
+
+    def __init__(self, session_id: str, request_id: Any, method: Optional[str]):
+        self.session_id = session_id
+        self.request_id = request_id
+        self.method = method
+        self.started_at = time.time()
+        self.phases: Dict[str, float] = {}
+        # 投递给服务端循环的时间点（perf_counter），用于计算tool阶段
+        self.mark = 0.0
+
+    def add(self, phase: str, duration: float) -> None:
+        """累加阶段耗时（秒）"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """计时上下文"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "request_id": self.request_id,
+            "method": self.method,
+            "started_at": self.started_at,
+            "phases_ms": {name: round(value * 1000, 3) for name, value in self.phases.items()},
+            "total_ms": round(sum(self.phases.values()) * 1000, 3),
+        }
+
+
+def traced(trace: Optional[Trace], phase: str) -> ContextManager[None]:
+    """为可能为None的追踪计时，未启用追踪时是空上下文"""
+    return trace.phase(phase) if trace is not None else nullcontext()
+
+
+class RequestTracer:
+    """
+    请求追踪器
+
+    已完成的追踪保存在定长环形缓冲区中；等待响应的请求按(会话ID, 请求ID)暂存，
+    数量同样有上限，超出时丢弃最旧的。未启用时所有方法都是空操作。
+    """
+
+    def __init__(self, enabled: bool = False, capacity: int = 1000):
+        self.enabled = enabled
+        self.capacity = capacity
+        self._completed: Deque[Trace] = deque(maxlen=capacity)
+        self._pending: "OrderedDict[Tuple[str, Any], Trace]" = OrderedDict()
+
+    def start(self, session_id: str, request_id: Any, method: Optional[str] = None) -> Optional[Trace]:
+        """开始追踪一个请求，未启用时返回None"""
+        if not self.enabled:
+            return None
+        return Trace(session_id, request_id, method)
+
+    def wait_response(self, trace: Optional[Trace]) -> None:
+        """
+        登记等待响应的请求，应在投递给服务端循环之前调用
+
+        服务端产出同ID的响应时由pop_pending取出，没有ID的通知直接完成。
+        """
+        if trace is None:
+            return
+        trace.mark = time.perf_counter()
+        if trace.request_id is None:
+            self.finish(trace)
+            return
+        self._pending[(trace.session_id, trace.request_id)] = trace
+        while len(self._pending) > self.capacity:
+            self._pending.popitem(last=False)
+
+    def pop_pending(self, session_id: str, request_id: Any) -> Optional[Trace]:
+        """取出等待响应的追踪，并记录tool阶段（投递完成到产出响应）"""
+        trace = self._pending.pop((session_id, request_id), None)
+        if trace is not None:
+            elapsed = time.perf_counter() - trace.mark - trace.phases.get("enqueue", 0.0)
+            trace.add("tool", max(elapsed, 0.0))
+        return trace
+
+    def finish(self, trace: Optional[Trace]) -> None:
+        """完成追踪"""
+        if trace is not None:
+            self._completed.append(trace)
+
+    def recent(self, session_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        最近完成的追踪，按时间倒序
+
+        Args:
+            session_id: 只返回该会话的追踪
+            limit: 最多返回条数
+
+        Returns:
+            追踪记录列表
+        """
+        result = []
+        for trace in reversed(self._completed):
+            if session_id is not None and trace.session_id != session_id:
+                continue
+            result.append(trace.to_dict())
+            if len(result) >= limit:
+                break
+        return result